@@ -96,7 +96,9 @@ pd.set_option('display.max_columns', None)    # tüm sütunlar gelsin
 pd.set_option("display.width", 500)           # tüm sütunlar "yanyana" gelsin
 pd.set_option("display.precision", 5)         # float türündeki sayılarda virgül sonrasi 5 basamak olsun
 
-df_ = pd.read_excel("/Users/gozdemadendere/Desktop/PycharmProjects/CRM_Analytics/datasets/online_retail_II.xlsx", sheet_name="Year 2009-2010")
+# Veri setini isimle, registry üzerinden okuyalım (kök dizin: MIUUL_DATA_ROOT, Excel yerine Arrow cache okunur)
+from miuul_utils.datasets import get_dataset
+df_ = get_dataset("online_retail_2009_2010")
 df = df_.copy()
 
 
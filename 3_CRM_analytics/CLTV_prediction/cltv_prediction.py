@@ -103,6 +103,8 @@ import matplotlib.pyplot as plt
 from lifetimes import BetaGeoFitter
 from lifetimes import GammaGammaFitter
 from lifetimes.plotting import plot_period_transactions
+from miuul_utils.data_prep import retail_data_prep   # create_cltv_p içindeki tek geçişlik veri temizliği
+from miuul_utils.model_cache import CLTVModelCache   # create_cltv_p'de aynı veri için modeller tekrar fit edilmez
 
 
 pd.set_option('display.max_columns', None)    # tüm sütunlar gelsin
@@ -135,7 +137,9 @@ def replace_with_thresholds(dataframe, variable):
 # 3. Veriyi Anlama (Data Understanding)
 ##################################################################################
 
-df_ = pd.read_excel("/Users/gozdemadendere/Desktop/PycharmProjects/CRM_Analytics/datasets/online_retail_II.xlsx", sheet_name="Year 2010-2011")
+# Veri setini isimle, registry üzerinden okuyalım (kök dizin: MIUUL_DATA_ROOT, Excel yerine Arrow cache okunur)
+from miuul_utils.datasets import get_dataset
+df_ = get_dataset("online_retail_2010_2011")
 df = df_.copy()
 
 df.head()
@@ -519,14 +523,9 @@ cltv_final.sort_values(by="clv", ascending=False).head(50)
 ##############################################################
 
 
-def create_cltv_p(dataframe, month=3):
-    # 1. Veri Ön İşleme
-    dataframe.dropna(inplace=True)
-    dataframe = dataframe[~dataframe["Invoice"].str.contains("C", na=False)]
-    dataframe = dataframe[dataframe["Quantity"] > 0]
-    dataframe = dataframe[dataframe["Price"] > 0]
-    replace_with_thresholds(dataframe, "Quantity")
-    replace_with_thresholds(dataframe, "Price")
+def create_cltv_p(dataframe, month=3, cache=None):
+    # 1. Veri Ön İşleme (eksik değer, iptal, Quantity / Price filtreleri tek maskede; eşikler sadece üstten baskılanır)
+    dataframe = retail_data_prep(dataframe, cap_lower=False)
     dataframe["TotalPrice"] = dataframe["Quantity"] * dataframe["Price"]
     today_date = dt.datetime(2011, 12, 11)
 
@@ -543,11 +542,17 @@ def create_cltv_p(dataframe, month=3):
     cltv_df["recency"] = cltv_df["recency"] / 7
     cltv_df["T"] = cltv_df["T"] / 7
 
-    # 2. BG-NBD Modelinin Kurulması
-    bgf = BetaGeoFitter(penalizer_coef=0.001)
-    bgf.fit(cltv_df['frequency'],
-            cltv_df['recency'],
-            cltv_df['T'])
+    # 2. BG-NBD Modelinin Kurulması (cache verilirse parametreler diskte saklanır, aynı veride fit atlanır)
+    if cache is None:
+        bgf = BetaGeoFitter(penalizer_coef=0.001)
+        bgf.fit(cltv_df['frequency'],
+                cltv_df['recency'],
+                cltv_df['T'])
+    else:
+        bgf = cache.fit_bgnbd(cltv_df['frequency'],
+                              cltv_df['recency'],
+                              cltv_df['T'],
+                              penalizer_coef=0.001)
 
     cltv_df["expected_purc_1_week"] = bgf.predict(1,
                                                   cltv_df['frequency'],
@@ -565,8 +570,11 @@ def create_cltv_p(dataframe, month=3):
                                                    cltv_df['T'])
 
     # 3. GAMMA-GAMMA Modelinin Kurulması
-    ggf = GammaGammaFitter(penalizer_coef=0.01)
-    ggf.fit(cltv_df['frequency'], cltv_df['monetary'])
+    if cache is None:
+        ggf = GammaGammaFitter(penalizer_coef=0.01)
+        ggf.fit(cltv_df['frequency'], cltv_df['monetary'])
+    else:
+        ggf = cache.fit_gamma_gamma(cltv_df['frequency'], cltv_df['monetary'], penalizer_coef=0.01)
     cltv_df["expected_average_profit"] = ggf.conditional_expected_average_profit(cltv_df['frequency'],
                                                                                  cltv_df['monetary'])
 
@@ -591,6 +599,9 @@ df = df_.copy()
 
 cltv_final2 = create_cltv_p(df)
 
+# Model cache: aynı veride fit atlanır, aynı veri setinin yeni günlerinde önceki parametrelerden başlanır (warm start)
+# cltv_final2 = create_cltv_p(df, cache=CLTVModelCache(dataset="online_retail_2010_2011"))
+
 
 # Csv dosyası olarak kaydedelim.  (kodu çalıştır, Project'te CRM_Analytics sağ tıkla, Reload from Disk tıkla, dosya orada)
 cltv_final2.to_csv("cltv_prediction.csv")
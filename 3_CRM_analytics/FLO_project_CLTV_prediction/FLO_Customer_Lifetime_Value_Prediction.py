@@ -78,6 +78,10 @@ import matplotlib.pyplot as plt
 from lifetimes import BetaGeoFitter
 from lifetimes import GammaGammaFitter
 from lifetimes.plotting import plot_period_transactions
+from miuul_utils.data_prep import replace_with_grouped_thresholds
+from miuul_utils.model_cache import CLTVModelCache   # create_clv_df'te aynı veri için modeller tekrar fit edilmez
+from miuul_utils.bgnbd import expected_purchases      # birden çok ufuk için beklenen satış tek çağrıda
+from miuul_utils.cltv_model import CLTVModel, fit_cltv_models_by_group   # model saklama / skorlama, kanal bazında modeller
 
 pd.set_option('display.max_columns', None)    # tüm sütunlar gelsin
 pd.set_option("display.width", 500)           # tüm sütunlar "yanyana" gelsin
@@ -112,7 +116,9 @@ def replace_with_thresholds(dataframe, variable):
 ##################################################################################
 
 # Read from CSV
-df_ = pd.read_csv("/Users/gozdemadendere/Desktop/PycharmProjects/CRM_Analytics/FLO_project_CLV_prediction/flo_data_20k.csv")
+# Veri setini isimle, registry üzerinden okuyalım (kök dizin: MIUUL_DATA_ROOT)
+from miuul_utils.datasets import get_dataset
+df_ = get_dataset("flo_data_20k")
 df = df_.copy()
 
 ################################################
@@ -486,12 +492,15 @@ six_months_max_clv_customers.groupby("clv_segment").agg({"exp_sales_6_month": ["
 ##############################################################
 
 
-def create_clv_df(dataframe):
+def create_clv_df(dataframe, cache=None, model_path=None, by=None):
+    # Kanal bazındaki modeller worker process'lerde kurulur, cache orada kullanılamaz
+    if by is not None and cache is not None:
+        raise ValueError("cache can not be combined with by: per-group models are fitted in worker processes")
 
     # Veriyi Hazırlama
+    # 4 sütunun eşikleri tek quantile çağrısıyla hesaplanır, hepsi tek np.clip ile baskılanır (by="order_channel" ile kanal bazında da yapılabilir)
     columns = ["order_num_total_ever_online", "order_num_total_ever_offline", "customer_value_total_ever_offline","customer_value_total_ever_online"]
-    for col in columns:
-        replace_with_thresholds(dataframe, col)
+    replace_with_grouped_thresholds(dataframe, columns, round_limits=True)
 
     dataframe["order_num_total"] = dataframe["order_num_total_ever_online"] + dataframe["order_num_total_ever_offline"]
     dataframe["customer_value_total"] = dataframe["customer_value_total_ever_offline"] + dataframe["customer_value_total_ever_online"]
@@ -510,23 +519,44 @@ def create_clv_df(dataframe):
     clv_df["monetary_clv_avg"] = dataframe["customer_value_total"] / dataframe["order_num_total"]
     clv_df = clv_df[(clv_df['frequency'] > 1)]
 
-    # BG-NBD Modelinin Kurulması
-    bgf = BetaGeoFitter(penalizer_coef=0.001)
-    bgf.fit(clv_df['frequency'],
-            clv_df['recency_clv_weekly'],
-            clv_df['T_weekly'])
-    clv_df["exp_sales_3_month"] = bgf.predict(4 * 3,
-                                               clv_df['frequency'],
-                                               clv_df['recency_clv_weekly'],
-                                               clv_df['T_weekly'])
-    clv_df["exp_sales_6_month"] = bgf.predict(4 * 6,
-                                               clv_df['frequency'],
-                                               clv_df['recency_clv_weekly'],
-                                               clv_df['T_weekly'])
+    # by="order_channel" : her kanal için ayrı BG-NBD + Gamma-Gamma modeli, gruplar paralel worker process'lerde kurulur,
+    # segmentler kanalın kendi CLTV çeyreklerine göre verilir
+    if by is not None:
+        clv_df[by] = dataframe[by]
+        scores, models = fit_cltv_models_by_group(clv_df, by, month=6,
+                                                  horizons={"exp_sales_3_month": 4 * 3, "exp_sales_6_month": 4 * 6},
+                                                  recency="recency_clv_weekly", T="T_weekly", monetary="monetary_clv_avg")
+        # model_path burada bir klasör: her kanalın modeli {model_path}/{kanal}.json olarak saklanır
+        if model_path is not None:
+            for group, model in models.items():
+                model.save(f"{model_path}/{group}.json")
+        scores = scores.rename(columns={"expected_average_profit": "exp_average_value", "segment": "clv_segment"})
+        return pd.concat([clv_df, scores.drop(columns=by)], axis=1)
+
+    # BG-NBD Modelinin Kurulması (cache verilirse parametreler diskte saklanır, aynı veride fit atlanır)
+    if cache is None:
+        bgf = BetaGeoFitter(penalizer_coef=0.001)
+        bgf.fit(clv_df['frequency'],
+                clv_df['recency_clv_weekly'],
+                clv_df['T_weekly'])
+    else:
+        bgf = cache.fit_bgnbd(clv_df['frequency'],
+                              clv_df['recency_clv_weekly'],
+                              clv_df['T_weekly'],
+                              penalizer_coef=0.001)
+    # 3 ve 6 aylık beklenen satışlar tek çağrıda (ortak terimler bir kez hesaplanır), müşteri x ufuk matrisi
+    clv_df[["exp_sales_3_month", "exp_sales_6_month"]] = expected_purchases(bgf,
+                                                                            [4 * 3, 4 * 6],
+                                                                            clv_df['frequency'],
+                                                                            clv_df['recency_clv_weekly'],
+                                                                            clv_df['T_weekly']).to_numpy()
 
     # # Gamma-Gamma Modelinin Kurulması
-    ggf = GammaGammaFitter(penalizer_coef=0.01)
-    ggf.fit(clv_df['frequency'], clv_df['monetary_clv_avg'])
+    if cache is None:
+        ggf = GammaGammaFitter(penalizer_coef=0.01)
+        ggf.fit(clv_df['frequency'], clv_df['monetary_clv_avg'])
+    else:
+        ggf = cache.fit_gamma_gamma(clv_df['frequency'], clv_df['monetary_clv_avg'], penalizer_coef=0.01)
     clv_df["exp_average_value"] = ggf.conditional_expected_average_profit(clv_df['frequency'],
                                                                            clv_df['monetary_clv_avg'])
 
@@ -544,9 +574,30 @@ def create_clv_df(dataframe):
     # CLV segmentleme
     clv_df["clv_segment"] = pd.qcut(clv_df["clv"], 4, labels=["D", "C", "B", "A"])
 
+    # Modellerin saklanması: yeni müşteriler tekrar fit etmeden, aynı parametreler ve segment sınırlarıyla skorlanabilir
+    if model_path is not None:
+        CLTVModel.from_fitted(bgf, ggf, month=6, horizons={"exp_sales_3_month": 4 * 3, "exp_sales_6_month": 4 * 6},
+                              training_clv=clv_df["clv"]).save(model_path)
+
     return clv_df
 
 clv_df = create_clv_df(df)
 
+# Modellerin saklanması (kurulan parametreler ve segment sınırları JSON olarak yazılır)
+# clv_df = create_clv_df(df, model_path="models/flo_cltv.json")
+
+# Model cache: aynı veride fit atlanır, aynı veri setinin yeni günlerinde önceki parametrelerden başlanır (warm start)
+# clv_df = create_clv_df(df, cache=CLTVModelCache(dataset="flo_data_20k"))
+
+# Kanal bazında modeller (Android App, Desktop, Ios App, Mobile)
+# clv_df_by_channel = create_clv_df(df, by="order_channel")
+# Her kanalın modeli ayrı dosyaya: models/flo_cltv_by_channel/{kanal}.json (cache kanal bazında kullanılamaz)
+# clv_df_by_channel = create_clv_df(df, model_path="models/flo_cltv_by_channel", by="order_channel")
+
+
+# Yeni bir müşteri batch'inin skorlanması (frequency, recency_clv_weekly, T_weekly, monetary_clv_avg sütunlarıyla)
+# model = CLTVModel.load("models/flo_cltv.json")
+# model.score(new_clv_df, recency="recency_clv_weekly", T="T_weekly", monetary="monetary_clv_avg")
+
 
 clv_df.head(10)
\ No newline at end of file
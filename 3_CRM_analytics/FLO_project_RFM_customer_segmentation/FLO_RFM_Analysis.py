@@ -68,7 +68,10 @@ pd.set_option('display.float_format', '{:.0f}'.format)  # float türündeki say
 
 
 # Read the data from CSV
-df_ = pd.read_csv("/Users/gozdemadendere/Desktop/PycharmProjects/CRM_Analytics/FLO_project_RFM_customer_segmentation/flo_data_20k.csv")
+# Veri setini isimle, registry üzerinden okuyalım (kök dizin: MIUUL_DATA_ROOT)
+from miuul_utils.datasets import get_dataset
+from miuul_utils.rfm import assign_segments, rfm_code
+df_ = get_dataset("flo_data_20k")
 df = df_.copy()
 
 
@@ -402,23 +405,15 @@ def create_rfm(dataframe):
     rfm["recency_score"] = pd.qcut(rfm['recency'], 5, labels=[5, 4, 3, 2, 1])
     rfm["frequency_score"] = pd.qcut(rfm['frequency'].rank(method="first"), 5, labels=[1, 2, 3, 4, 5])
     rfm["monetary_score"] = pd.qcut(rfm['monetary'], 5, labels=[1, 2, 3, 4, 5])
-    rfm["RF_SCORE"] = (rfm['recency_score'].astype(str) + rfm['frequency_score'].astype(str))
-    rfm["RFM_SCORE"] = (rfm['recency_score'].astype(str) + rfm['frequency_score'].astype(str) + rfm['monetary_score'].astype(str))
+    # RF_SCORE / RFM_SCORE string birleştirme yerine küçük integer kod olarak: (5, 4) -> 54, (5, 4, 3) -> 543
+    rfm["RF_SCORE"] = rfm_code(rfm['recency_score'], rfm['frequency_score'])
+    rfm["RFM_SCORE"] = rfm_code(rfm['recency_score'], rfm['frequency_score'], rfm['monetary_score'])
 
     # SEGMENTLERIN ISIMLENDIRILMESI
-    seg_map = {
-        r'[1-2][1-2]': 'hibernating',
-        r'[1-2][3-4]': 'at_Risk',
-        r'[1-2]5': 'cant_loose',
-        r'3[1-2]': 'about_to_sleep',
-        r'33': 'need_attention',
-        r'[3-4][4-5]': 'loyal_customers',
-        r'41': 'promising',
-        r'51': 'new_customers',
-        r'[4-5][2-3]': 'potential_loyalists',
-        r'5[4-5]': 'champions'
-    }
-    rfm['segment'] = rfm['RF_SCORE'].replace(seg_map, regex=True)
+    # seg_map regex'leri yerine 5x5'lik lookup tablosu (SEGMENT_TABLE[recency_score - 1, frequency_score - 1])
+    segment_names = ['hibernating', 'at_Risk', 'cant_loose', 'about_to_sleep', 'need_attention', 'loyal_customers',
+                     'promising', 'new_customers', 'potential_loyalists', 'champions']
+    rfm['segment'] = assign_segments(rfm['recency_score'], rfm['frequency_score'], segment_names)
 
     return rfm[["customer_id", "recency","frequency","monetary","RF_SCORE","RFM_SCORE","segment"]]
 
@@ -52,7 +52,9 @@ pd.set_option('display.expand_frame_repr', False)       # Geniş Dataframe'lerin
 pd.set_option("display.max_rows", 100)                  # DataFrame'in gösterilecek maksimum satır sayısını belirler.
 
 # pip install openpyxl
-df_ = pd.read_excel("datasets/online_retail_II.xlsx", sheet_name="Year 2010-2011")    # https://archive.ics.uci.edu/ml/datasets/Online+Retail+II
+# Veri setini isimle, registry üzerinden okuyalım (kök dizin: MIUUL_DATA_ROOT, Excel yerine Arrow cache okunur)
+from miuul_utils.datasets import get_dataset
+df_ = get_dataset("online_retail_2010_2011")    # https://archive.ics.uci.edu/ml/datasets/Online+Retail+II
 
 # Sorun olursa: df_ = pd.read_excel("datasets/online_retail_II.xlsx", sheet_name="Year 2010-2011", engine="openpyxl")
 
@@ -201,7 +203,7 @@ def check_id(dataframe, stock_code):
     print(product_name)
 
 
-check_id(df_fr, 10120)
+check_id(df_fr, "10120")   # StockCode cache üzerinden str olarak gelir
 
 
 
@@ -232,7 +234,7 @@ rules = association_rules(frequent_itemsets,    # Sık öğe kümelerini içeren
 rules.loc[(rules["support"] > 0.05) & (rules["confidence"] > 0.1) & (rules["lift"] > 5)]    # veya: rules[(rules["support"]>0.05) & (rules["confidence"]>0.1) & (rules["lift"]>5)]
 
 
-check_id(df_fr, 21086)
+check_id(df_fr, "21086")
 
 # Sonuç dataframe inde her satır, bir kuralı temsil eder ve bu kuralda iki bileşen bulunur: antecedents (önceden koşul, X) ve consequents (sonuç, Y).
 # İki bileşen arasında bir ilişki oluşturulur ve bu kural, alışveriş sepeti verileri üzerinde bulunan bir ilişkiyi ifade eder.
@@ -266,14 +268,9 @@ def replace_with_thresholds(dataframe, variable):
 
 
 # Data Cleaning için tanımladığımız fonksiyona, eşik değer fonksiyonunu da ekleyelim:
-def retail_data_prep(dataframe):
-    dataframe.dropna(inplace=True)  # Veri setindeki tüm eksik değerleri (NaN) kaldırır.
-    dataframe = dataframe[~dataframe["Invoice"].str.contains("C", na=False)]
-    dataframe = dataframe[dataframe["Quantity"] > 0]
-    dataframe = dataframe[dataframe["Price"] > 0]
-    replace_with_thresholds(dataframe, "Quantity")
-    replace_with_thresholds(dataframe, "Price")
-    return dataframe
+# Script versiyonunda ortak retail_data_prep'i kullanıyoruz: dropna + 3 filtre tek maskede birleşir, Quantity ve Price
+# eşikleri tek quantile çağrısıyla hesaplanıp np.clip ile uygulanır. (Ara kopya ve SettingWithCopy uyarısı oluşmaz)
+from miuul_utils.data_prep import retail_data_prep
 
 # Invoice-Product Matrisini oluşturan bir fonksiyon oluşturalım:
 # id=False ise sütunlarda Description yer alır, id=True ise sütunlarda StockCode yer alır.
@@ -318,9 +315,9 @@ rules[(rules["support"]>0.05) & (rules["confidence"]>0.1) & (rules["lift"]>5)]
 # 5. Sepet Aşamasındaki Kullanıcılara Ürün Önerisinde Bulunmak
 ############################################
 
-# Örnek: Kullanıcı örnek ürün id: 22492
+# Örnek: Kullanıcı örnek ürün id: "22492"
 
-product_id = 22492
+product_id = "22492"
 check_id(df, product_id)
 
 sorted_rules = rules.sort_values("lift", ascending=False)   # dilediğimiz değişkene göre sıralarız lift / support/ confidence
@@ -335,7 +332,7 @@ for i, product in enumerate(sorted_rules["antecedents"]):
 
 recommendation_list[0:3]
 
-check_id(df, 22326)
+check_id(df, "22326")
 
 
 
@@ -354,9 +351,9 @@ def arl_recommender(rules_df, product_id, rec_count=1):
     return recommendation_list[0:rec_count]
 
 
-arl_recommender(rules, 22492, 1)
-arl_recommender(rules, 22492, 2)
-arl_recommender(rules, 22492, 3)
+arl_recommender(rules, "22492", 1)
+arl_recommender(rules, "22492", 2)
+arl_recommender(rules, "22492", 3)
 
 
 
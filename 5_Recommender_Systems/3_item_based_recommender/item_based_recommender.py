@@ -30,8 +30,11 @@ pd.set_option("display.precision", 2)                   # Float türündeki say
 pd.set_option('display.expand_frame_repr', False)       # Geniş Dataframe'lerin tamamını terminal penceresine sığdırmak için kullanılır.
 pd.set_option("display.max_rows", 100)                  # DataFrame'in gösterilecek maksimum satır sayısını belirler.
 
-movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')  # Veri seti: https://grouplens.org/datasets/movielens/
-rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+# Veri setlerini isimle, registry üzerinden okuyalım: dosyalar process içinde 1 kez okunur,
+# aşağıdaki create_user_movie_df de aynı veri setlerini kullanır.
+from miuul_utils.datasets import get_dataset
+movie = get_dataset("movielens_movie")  # Veri seti: https://grouplens.org/datasets/movielens/
+rating = get_dataset("movielens_rating_timestamp")    # timestamp, son 5 puan verilen filmi bulmak için gerekli
 
 movie.head()
 rating.head()
@@ -177,8 +180,9 @@ check_film("Vita", user_movie_df)      # ['Dolce Vita, La (1960)', 'Life Is Beau
 # Bu fonksiyon, UserId-Movie dataframe'ini oluşturur ve değerlerde rating'leri içerir.
 def create_user_movie_df():
     import pandas as pd
-    movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')
-    rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+    from miuul_utils.datasets import get_dataset
+    movie = get_dataset("movielens_movie")      # dosya process içinde 1 kez okunur
+    rating = get_dataset("movielens_rating_timestamp")    # script başındaki ile aynı veri seti, tekrar okunmaz
     df = movie.merge(rating, how="left", on="movieId")                      # movie ve rating df lerini birleştirir
     comment_counts = pd.DataFrame(df["title"].value_counts())               # her film için yapılan yorum/puanlama sayısını hesaplar
     rare_movies = comment_counts.loc[comment_counts["count"] <= 1000, :].index     # 1000'den az kere oylanan filmleri getirelim
@@ -40,8 +40,10 @@ pd.set_option('display.max_columns', None)
 # Temel amaç, bir fonksiyonun minimum veya maksimum noktasını bulmaktır.
 # Bir fonksiyonun türevi, o fonksiyonun artış yönünü verir.
 
-movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')
-rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+# Veri setlerini isimle, registry üzerinden okuyalım (int32 / float32 tipler, Arrow cache)
+from miuul_utils.datasets import get_dataset
+movie = get_dataset("movielens_movie")
+rating = get_dataset("movielens_rating")
 df = movie.merge(rating, how="left", on="movieId")
 df.head()
 
@@ -38,8 +38,11 @@ pd.set_option("display.precision", 2)                   # Float türündeki say
 pd.set_option('display.expand_frame_repr', False)       # Geniş Dataframe'lerin tamamını terminal penceresine sığdırmak için kullanılır.
 pd.set_option("display.max_rows", 100)                  # DataFrame'in gösterilecek maksimum satır sayısını belirler.
 
-movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')  # Veri seti: https://grouplens.org/datasets/movielens/
-rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+# Veri setlerini isimle, registry üzerinden okuyalım: dosyalar process içinde 1 kez okunur,
+# aşağıdaki create_user_movie_df de aynı veri setlerini kullanır.
+from miuul_utils.datasets import get_dataset
+movie = get_dataset("movielens_movie")  # Veri seti: https://grouplens.org/datasets/movielens/
+rating = get_dataset("movielens_rating_timestamp")    # timestamp, son 5 puan verilen filmi bulmak için gerekli
 
 movie.head()
 rating.head()
@@ -185,8 +188,9 @@ check_film("Vita", user_movie_df)      # ['Dolce Vita, La (1960)', 'Life Is Beau
 # Bu fonksiyon, UserId-Movie dataframe'ini oluşturur ve değerlerde rating'leri içerir.
 def create_user_movie_df():
     import pandas as pd
-    movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')
-    rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+    from miuul_utils.datasets import get_dataset
+    movie = get_dataset("movielens_movie")      # dosya process içinde 1 kez okunur
+    rating = get_dataset("movielens_rating_timestamp")    # script başındaki ile aynı veri seti, tekrar okunmaz
     df = movie.merge(rating, how="left", on="movieId")                      # movie ve rating df lerini birleştirir
     comment_counts = pd.DataFrame(df["title"].value_counts())               # her film için yapılan yorum/puanlama sayısını hesaplar
     rare_movies = comment_counts.loc[comment_counts["count"] <= 1000, :].index     # 1000'den az kere oylanan filmleri getirelim
@@ -247,8 +251,11 @@ pd.set_option("display.precision", 2)                   # Float türündeki say
 pd.set_option('display.expand_frame_repr', False)       # Geniş Dataframe'lerin tamamını terminal penceresine sığdırmak için kullanılır.
 pd.set_option("display.max_rows", 100)                  # DataFrame'in gösterilecek maksimum satır sayısını belirler.
 
-movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')  # Veri seti: https://grouplens.org/datasets/movielens/
-rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+# Veri setlerini isimle, registry üzerinden okuyalım: dosyalar process içinde 1 kez okunur,
+# aşağıdaki create_user_movie_df de aynı veri setlerini kullanır.
+from miuul_utils.datasets import get_dataset
+movie = get_dataset("movielens_movie")  # Veri seti: https://grouplens.org/datasets/movielens/
+rating = get_dataset("movielens_rating_timestamp")    # timestamp, son 5 puan verilen filmi bulmak için gerekli
 
 movie.head()
 rating.head()
@@ -482,8 +489,9 @@ movies_to_be_recommend.merge(movie[["movieId", "title"]])["title"][:5]
 # Bu fonksiyon, userid-title (kullanıcı-film) etkileşimlerini içeren bir tablo oluşturur.
 def create_user_movie_df():
     import pandas as pd
-    movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')
-    rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+    from miuul_utils.datasets import get_dataset
+    movie = get_dataset("movielens_movie")      # dosya process içinde 1 kez okunur
+    rating = get_dataset("movielens_rating_timestamp")    # script başındaki ile aynı veri seti, tekrar okunmaz
     df = movie.merge(rating, how="left", on="movieId")                      # movie ve rating df lerini birleştirir
     comment_counts = pd.DataFrame(df["title"].value_counts())               # her film için yapılan yorum/puanlama sayısını hesaplar
     rare_movies = comment_counts.loc[comment_counts["count"] <= 1000, :].index     # 1000'den az kere oylanan filmleri getirelim
@@ -522,7 +530,8 @@ def user_based_recommender(random_user, user_movie_df, ratio=60, cor_th=0.65, sc
 
     top_users = top_users.sort_values(by='corr', ascending=False)
     top_users.rename(columns={"user_id_2": "userId"}, inplace=True)
-    rating = pd.read_csv('datasets/movie_lens_dataset/rating.csv')
+    from miuul_utils.datasets import get_dataset
+    rating = get_dataset("movielens_rating_timestamp")    # her çağrıda dosyayı baştan okumak yerine bellekteki veri seti
     top_users_ratings = top_users.merge(rating[["userId", "movieId", "rating"]], how='inner')
     top_users_ratings['weighted_rating'] = top_users_ratings['corr'] * top_users_ratings['rating']
 
@@ -530,7 +539,7 @@ def user_based_recommender(random_user, user_movie_df, ratio=60, cor_th=0.65, sc
     recommendation_df = recommendation_df.reset_index()
 
     movies_to_be_recommend = recommendation_df[recommendation_df["weighted_rating"] > score].sort_values("weighted_rating", ascending=False)
-    movie = pd.read_csv('datasets/movie_lens_dataset/movie.csv')
+    movie = get_dataset("movielens_movie")
     return movies_to_be_recommend.merge(movie[["movieId", "title"]])
 
 
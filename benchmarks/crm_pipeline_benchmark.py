@@ -0,0 +1,168 @@
+##################################################################################
+# BENCHMARK : CRM pipeline'larının (RFM, CLTV) sentetik veride ölçeklenmesi
+##################################################################################
+
+# Her pipeline adımı için süre ve peak RSS (process'in kullandığı fiziksel bellek) ölçülür.
+# --rows ile verilen her boyut için sentetik Online Retail II verisi üretilir (miuul_utils/synthetic.py):
+# - --max-in-memory'e kadar (varsayılan 20M satır) veri bellekte üretilir ve tüm adımlar çalıştırılır.
+# - Daha büyük boyutlarda veri chunk chunk Parquet'e yazılır, RFM out-of-core hesaplanır.
+
+# Kullanım (repo kök dizininden):
+# python -m benchmarks.crm_pipeline_benchmark                                  -> 1M, 10M, 100M satır
+# python -m benchmarks.crm_pipeline_benchmark --rows 1000000 --output bench.json
+# python -m benchmarks.crm_pipeline_benchmark --rows 1000000 --baseline bench.json   -> regresyon varsa exit code 1
+
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+# pip install psutil
+try:
+    import psutil
+except ImportError:  # psutil yoksa adım bazında değil, process başından beri görülen peak RSS raporlanır
+    psutil = None
+
+from miuul_utils.cltv import cltv_p_metrics, create_cltv_c, fit_cltv_models, predict_cltv
+from miuul_utils.data_prep import retail_data_prep
+from miuul_utils.rfm import create_rfm, create_rfm_out_of_core, rfm_snapshots
+from miuul_utils.synthetic import synthetic_online_retail, write_synthetic_online_retail
+
+
+DEFAULT_ROWS = [1_000_000, 10_000_000, 100_000_000]
+SNAPSHOT_DATES = pd.date_range("2011-01-01", "2011-12-01", freq="MS")
+
+
+class PeakRSS:
+    """
+    Context manager that samples the resident set size of this process in a background thread
+    and keeps the maximum seen while the block runs.
+
+    Example Usage:
+    --------------
+    with PeakRSS() as peak:
+        create_rfm(df_)
+    peak.mb
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _rss():
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.peak = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    @property
+    def mb(self):
+        return self.peak / 1024 ** 2
+
+
+# Bu fonksiyon, bir adımı çalıştırır; süre ve peak RSS değerlerini results listesine ekler.
+def measure(results, n_rows, stage, func):
+    gc.collect()
+    start = time.perf_counter()
+    with PeakRSS() as peak:
+        output = func()
+    seconds = time.perf_counter() - start
+    start_mb = peak.start / 1024 ** 2
+    results.append({"rows": n_rows, "stage": stage, "seconds": round(seconds, 3),
+                    "start_rss_mb": round(start_mb, 1), "peak_rss_mb": round(peak.mb, 1)})
+    print(f"{n_rows:>12,} rows | {stage:<28} | {seconds:8.2f} sec | peak RSS {peak.mb:9.1f} MB "
+          f"(+{peak.mb - start_mb:.1f} MB)", flush=True)
+    return output
+
+
+def run_in_memory(results, n_rows):
+    df = measure(results, n_rows, "generate", lambda: synthetic_online_retail(n_rows))
+    measure(results, n_rows, "retail_data_prep", lambda: retail_data_prep(df))
+    measure(results, n_rows, "create_rfm", lambda: create_rfm(df))
+    measure(results, n_rows, "create_rfm_hll", lambda: create_rfm(df, frequency="hll"))
+    measure(results, n_rows, "rfm_snapshots_12", lambda: rfm_snapshots(df, SNAPSHOT_DATES))
+    measure(results, n_rows, "create_cltv_c", lambda: create_cltv_c(df))
+    cltv_df = measure(results, n_rows, "cltv_p_metrics", lambda: cltv_p_metrics(df))
+    bgf, ggf = measure(results, n_rows, "cltv_p_fit", lambda: fit_cltv_models(cltv_df))
+    measure(results, n_rows, "cltv_p_fit_numpy", lambda: fit_cltv_models(cltv_df, engine="numpy"))
+    measure(results, n_rows, "cltv_p_predict", lambda: predict_cltv(cltv_df, bgf, ggf))
+
+
+def run_out_of_core(results, n_rows, workdir):
+    path = os.path.join(workdir, f"synthetic_online_retail_{n_rows}.parquet")
+    measure(results, n_rows, "generate_parquet", lambda: write_synthetic_online_retail(path, n_rows))
+    try:
+        measure(results, n_rows, "create_rfm_out_of_core", lambda: create_rfm_out_of_core(path))
+        measure(results, n_rows, "create_rfm_out_of_core_hll", lambda: create_rfm_out_of_core(path, frequency="hll"))
+    finally:
+        os.remove(path)
+
+
+# Bu fonksiyon, sonuçları önceki bir çalıştırmayla karşılaştırır, tolerance'ı aşan adımları döndürür.
+def regressions(results, baseline, tolerance):
+    previous = {(row["rows"], row["stage"]): row for row in baseline}
+    found = []
+    for row in results:
+        before = previous.get((row["rows"], row["stage"]))
+        if before is None:
+            continue
+        for metric in ["seconds", "peak_rss_mb"]:
+            if row[metric] > before[metric] * (1 + tolerance):
+                found.append(f"{row['rows']:,} rows | {row['stage']} | {metric}: {before[metric]} -> {row[metric]}")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--max-in-memory", type=int, default=20_000_000,
+                        help="larger sizes are written to parquet and processed out of core")
+    parser.add_argument("--workdir", default=tempfile.gettempdir(), help="folder of the temporary parquet files")
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--baseline", help="json file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / memory growth, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.rows:
+        if n_rows <= args.max_in_memory:
+            run_in_memory(results, n_rows)
+        else:
+            run_out_of_core(results, n_rows, args.workdir)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(results, json.load(file), args.tolerance)
+        for line in found:
+            print(f"REGRESSION | {line}")
+        sys.exit(1 if found else 0)
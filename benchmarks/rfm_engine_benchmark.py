@@ -0,0 +1,53 @@
+##################################################################################
+# BENCHMARK : lambda'lı groupby vs native named aggregation vs NumPy RFM engine
+##################################################################################
+
+# Kullanım (repo kök dizininden):
+# python -m benchmarks.rfm_engine_benchmark               -> 1M ve 10M satır
+# python -m benchmarks.rfm_engine_benchmark --rows 1000000
+
+import argparse
+import datetime as dt
+import time
+
+import pandas as pd
+
+from miuul_utils.rfm import _prepare_transactions, rfm_metrics
+from miuul_utils.synthetic import synthetic_online_retail
+
+
+# Bu fonksiyon, 3_CRM_analytics/RFM/rfm.py'deki lambda'lı aggregation'ı çalıştırır. (karşılaştırma için referans)
+def lambda_rfm_metrics(dataframe, today_date):
+    rfm = dataframe.groupby('Customer ID').agg({'InvoiceDate': lambda date: (today_date - date.max()).days,
+                                                'Invoice': lambda num: num.nunique(),
+                                                "TotalPrice": lambda price: price.sum()})
+    rfm.columns = ['recency', 'frequency', "monetary"]
+    return rfm
+
+
+def run(n_rows):
+    today_date = dt.datetime(2011, 12, 11)
+    # create_rfm ile aynı hazırlık: eksik değerli ve iptal satırları çıkar, TotalPrice ekle
+    df = _prepare_transactions(synthetic_online_retail(n_rows))
+    results = {}
+    timings = {}
+    for name, func in [("lambda", lambda: lambda_rfm_metrics(df, today_date)),
+                       ("pandas", lambda: rfm_metrics(df, today_date, engine="pandas")),
+                       ("numpy", lambda: rfm_metrics(df, today_date, engine="numpy"))]:
+        start = time.perf_counter()
+        results[name] = func()
+        timings[name] = time.perf_counter() - start
+
+    reference = results["lambda"]
+    for name in ["pandas", "numpy"]:
+        pd.testing.assert_frame_equal(results[name], reference, check_dtype=False, check_exact=False)
+
+    print(f"{n_rows:>12,} rows | {len(reference):>9,} customers | " +
+          " | ".join(f"{name}: {seconds:7.2f} sec ({timings['lambda'] / seconds:5.1f}x)" for name, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    for n_rows in parser.parse_args().rows:
+        run(n_rows)
@@ -0,0 +1,6 @@
+##################################################################################
+# miuul_utils : Bootcamp scriptlerinin ortak kullandığı yardımcı fonksiyonlar
+##################################################################################
+
+# Kullanım: repo kök dizini PYTHONPATH'te olmalı (PyCharm'da "Content Root" olarak zaten eklenir)
+# from miuul_utils.data_loader import load_online_retail
@@ -0,0 +1,291 @@
+##################################################################################
+# BG-NBD : NumPy ile BG-NBD modeli (analitik gradyan + L-BFGS-B)
+##################################################################################
+
+# lifetimes.BetaGeoFitter log-likelihood'u autograd ile türetip BFGS ile minimize eder: autograd her iterasyonda
+# tüm müşteriler için hesap grafiği kurar, fit sonunda bir de hessian hesaplanır. 1M müşteride dakikalar sürer.
+
+# BGNBDFitter aynı modeli (Fader, Hardie & Lee 2005, "Counting Your Customers the Easy Way") aynı parametrizasyonla kurar:
+# - Log-likelihood gammaln ve log-sum-exp (softplus) ile vektörel hesaplanır.
+# - Gradyan digamma ile kapalı formda, log-likelihood ile aynı ara terimlerden hesaplanır.
+# - Optimizasyon log-parametre uzayında L-BFGS-B ile yapılır. lifetimes'taki gibi recency ve T, 1 / max(T) ile ölçeklenir,
+#   başlangıç noktası ve penalizer terimi de aynıdır; parametreler lifetimes ile tolerans içinde eşleşir.
+
+# Not: Standart hatalar (hessian) hesaplanmaz. summary / confidence interval gerekiyorsa lifetimes.BetaGeoFitter kullanılmalı.
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.special import digamma, gammaln, hyp2f1
+
+
+BGNBD_PARAMS = ["r", "alpha", "a", "b"]
+FREQ_FACTORS = {"W": 4.345, "M": 1.0, "D": 30, "H": 30 * 24}    # bir aydaki zaman birimi (lifetimes customer_lifetime_value)
+
+
+# BGNBDFitter.fit yakınsamazsa fırlatılır (lifetimes.utils.ConvergenceError'ın karşılığı).
+# RuntimeError'dan türer: fit hatasını RuntimeError olarak yakalayan kodlar çalışmaya devam eder.
+class ConvergenceError(RuntimeError):
+    pass
+
+
+# Bu fonksiyon, sadece frequency'ye bağlı terimler (gammaln, digamma) için frequency'nin eşsiz değerlerini ve ağırlıklarını hazırlar.
+# frequency küçük tam sayılardır: bu terimler her iterasyonda müşteri başına değil, eşsiz değer başına bir kez hesaplanır.
+def _likelihood_inputs(frequency, recency, T, weights):
+    freq_values, freq_index = np.unique(frequency, return_inverse=True)
+    return freq_values, np.bincount(freq_index, weights), freq_index, recency, T, weights
+
+
+# Bu fonksiyon, log-parametrelerde ortalama negatif log-likelihood'u (+ penalizer) ve gradyanını birlikte döndürür.
+def _negative_log_likelihood(log_params, freq_values, freq_weights, freq_index, rec, T, weights, penalizer_coef):
+    params = np.exp(log_params)
+    r, alpha, a, b = params
+    x = freq_values
+    b_x_1 = b + np.maximum(x, 1) - 1
+    total_weight = freq_weights.sum()
+
+    # A_1 + A_2: sadece frequency'ye bağlı
+    A_12 = (gammaln(r + x) - gammaln(r) + r * np.log(alpha)
+            + gammaln(a + b) + gammaln(b + x) - gammaln(b) - gammaln(a + b + x))
+    # A_4'ün frequency'ye bağlı kısmı; tekrar alışverişi olmayanlarda A_4 yoktur (log 0 = -inf)
+    with np.errstate(divide="ignore"):
+        A_4_x = np.where(x > 0, np.log(a) - np.log(b_x_1), -np.inf)
+
+    r_x = (r + x)[freq_index]
+    alpha_T, alpha_rec = alpha + T, alpha + rec
+    log_alpha_T, log_alpha_rec = np.log(alpha_T), np.log(alpha_rec)
+    A_3 = -r_x * log_alpha_T
+    # log(exp(A_3) + exp(A_4)) = A_3 + softplus(A_4 - A_3); np.logaddexp'ten ~10 kat hızlı
+    diff = A_4_x[freq_index] + r_x * (log_alpha_T - log_alpha_rec)
+    exp_neg = np.exp(-np.abs(diff))
+    ll = freq_weights @ A_12 + weights @ A_3 + weights @ (np.maximum(diff, 0) + np.log1p(exp_neg))
+
+    # log-sum-exp'in türevi: iki terimin softmax ağırlıkları, sigmoid(diff)
+    weights_4 = weights * np.where(diff > 0, 1, exp_neg) / (1 + exp_neg)
+    weights_3 = weights - weights_4
+    digamma_ab = digamma(a + b) - digamma(a + b + x)
+    grad = np.array([
+        freq_weights @ (digamma(r + x) - digamma(r) + np.log(alpha)) - weights_3 @ log_alpha_T - weights_4 @ log_alpha_rec,
+        total_weight * r / alpha - r_x @ (weights_3 / alpha_T + weights_4 / alpha_rec),
+        freq_weights @ digamma_ab + weights_4.sum() / a,
+        freq_weights @ (digamma_ab + digamma(b + x) - digamma(b))
+        - np.bincount(freq_index, weights_4, minlength=len(x)) @ (1 / b_x_1)])
+    # d / d log(p) = p * d / dp
+    grad = params * (-grad / total_weight + 2 * penalizer_coef * params)
+    return -ll / total_weight + penalizer_coef * np.sum(params ** 2), grad
+
+
+class BGNBDFitter:
+    """
+    BG-NBD model with a vectorized log-likelihood, analytic gradients and an L-BFGS-B fit.
+    Same parameters (r, alpha, a, b) as lifetimes.BetaGeoFitter, usable wherever its predict is used
+    (e.g. GammaGammaFitter.customer_lifetime_value).
+
+    Parameters:
+    ----------
+    penalizer_coef: float
+        L2 penalty on the (time-scaled) parameters, as in lifetimes.
+
+    Example Usage:
+    --------------
+    bgf = BGNBDFitter(penalizer_coef=0.001)
+    bgf.fit(cltv_df["frequency"], cltv_df["recency"], cltv_df["T"])
+    bgf.params_
+    cltv_df["expected_purc_3_month"] = bgf.predict(12, cltv_df["frequency"], cltv_df["recency"], cltv_df["T"])
+    """
+
+    def __init__(self, penalizer_coef=0.0):
+        self.penalizer_coef = penalizer_coef
+        self.params_ = None
+
+    def __repr__(self):
+        if self.params_ is None:
+            return "<BGNBDFitter: not fitted>"
+        return "<BGNBDFitter: " + ", ".join(f"{name}: {value:.2f}" for name, value in self.params_.items()) + ">"
+
+    def fit(self, frequency, recency, T, weights=None, initial_params=None, tol=1e-7, maxiter=1000):
+        """
+        Fits the model by maximum likelihood.
+
+        Parameters:
+        ----------
+        frequency, recency, T: array_like
+            Repeat purchases, time between first and last purchase, time since first purchase.
+        weights: array_like, optional
+            Number of customers with each (frequency, recency, T) row.
+        initial_params: array_like, optional
+            Starting point in lifetimes' space: log([r, alpha / max(T), a, b]).
+        tol: float
+            Gradient tolerance of the optimizer (the tol of lifetimes' BFGS fit).
+
+        Returns:
+        -------
+        BGNBDFitter
+        """
+        frequency = np.asarray(frequency, dtype="float64")
+        recency = np.asarray(recency, dtype="float64")
+        T = np.asarray(T, dtype="float64")
+        weights = np.ones(len(T)) if weights is None else np.asarray(weights, dtype="float64")
+        if (frequency < 0).any() or (recency > T).any() or ((frequency == 0) & (recency != 0)).any():
+            raise ValueError("Expected 0 <= recency <= T, frequency >= 0 and recency == 0 when frequency == 0")
+
+        self._scale = 1.0 / T.max()
+        x0 = 0.1 * np.ones(4) if initial_params is None else np.asarray(initial_params, dtype="float64")
+        # tol, lifetimes'taki (BFGS) gibi gradyan toleransıdır; L-BFGS-B'nin fonksiyon değeri kriteri erken durdurmasın diye ftol küçük
+        output = minimize(_negative_log_likelihood, x0, jac=True, method="L-BFGS-B",
+                          args=(*_likelihood_inputs(frequency, recency * self._scale, T * self._scale, weights),
+                                self.penalizer_coef),
+                          options={"gtol": tol, "ftol": 1e-15, "maxiter": maxiter})
+        if not output.success:
+            raise ConvergenceError(f"BG-NBD fit did not converge: {output.message}")
+
+        self.params_ = pd.Series(np.exp(output.x), index=BGNBD_PARAMS)
+        self.params_["alpha"] /= self._scale
+        self._negative_log_likelihood_ = output.fun
+        self.n_iterations_ = output.nit
+        return self
+
+    def conditional_expected_number_of_purchases_up_to_time(self, t, frequency, recency, T):
+        """
+        Expected number of repeat purchases in the next t periods, given the purchase history (equation 10 of the paper).
+
+        Returns:
+        -------
+        numpy.ndarray or pandas.Series (if frequency is a Series)
+        """
+        r, alpha, a, b = self.params_[BGNBD_PARAMS]
+        index = frequency.index if isinstance(frequency, pd.Series) else None
+        x = np.asarray(frequency, dtype="float64")
+        recency = np.asarray(recency, dtype="float64")
+        T = np.asarray(T, dtype="float64")
+        t = np.asarray(t, dtype="float64")
+
+        _a, _b, _c = r + x, b + x, a + b + x - 1
+        z = t / (alpha + T + t)
+        with np.errstate(divide="ignore"):
+            ln_hyp_term = np.log(hyp2f1(_a, _b, _c, z))
+        # hyp2f1 taşarsa Euler dönüşümüyle eşdeğer formül
+        overflow = np.isinf(ln_hyp_term)
+        if overflow.any():
+            ln_hyp_term = np.where(overflow, np.log(hyp2f1(_c - _a, _c - _b, _c, z)) + (_c - _a - _b) * np.log(1 - z),
+                                   ln_hyp_term)
+        first_term = (a + b + x - 1) / (a - 1)
+        second_term = 1 - np.exp(ln_hyp_term + (r + x) * np.log((alpha + T) / (alpha + t + T)))
+        denominator = 1 + (x > 0) * (a / (b + np.maximum(x, 1) - 1)) * ((alpha + T) / (alpha + recency)) ** (r + x)
+        expected = first_term * second_term / denominator
+        return pd.Series(expected, index=index) if index is not None else expected
+
+    predict = conditional_expected_number_of_purchases_up_to_time
+
+
+def expected_purchases(bgf, horizons, frequency, recency, T):
+    """
+    Expected number of repeat purchases for several horizons in one call: a customers x horizons matrix.
+    Same values as calling bgf.predict(t, frequency, recency, T) for each horizon t.
+
+    The horizon-dependent part of the formula (hyp2f1 and the (alpha + T) / (alpha + T + t) power) depends only
+    on (frequency, T): it is computed once per unique (frequency, T) pair and horizon. The recency-dependent
+    denominator is computed once per customer.
+
+    Parameters:
+    ----------
+    bgf: BGNBDFitter or lifetimes.BetaGeoFitter
+        Fitted model (params_ r, alpha, a, b).
+    horizons: array_like
+        Prediction horizons in the time unit of T (e.g. weeks).
+    frequency, recency, T: array_like
+        Purchase history of the customers.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per customer (index of frequency if it is a Series), one column per horizon.
+
+    Example Usage:
+    --------------
+    expected = expected_purchases(bgf, [1, 4, 12], cltv_df["frequency"], cltv_df["recency"], cltv_df["T"])
+    cltv_df[["expected_purc_1_week", "expected_purc_1_month", "expected_purc_3_month"]] = expected.to_numpy()
+    """
+    r, alpha, a, b = (float(bgf.params_[name]) for name in BGNBD_PARAMS)
+    index = frequency.index if isinstance(frequency, pd.Series) else None
+    x = np.asarray(frequency, dtype="float64")
+    recency = np.asarray(recency, dtype="float64")
+    T = np.asarray(T, dtype="float64")
+    t = np.atleast_1d(np.asarray(horizons, dtype="float64"))
+
+    keys = pd.DataFrame({"x": x, "T": T})
+    pair_index = keys.groupby(["x", "T"], sort=False).ngroup().to_numpy()
+    pairs = keys.drop_duplicates()
+    pair_x, pair_T = pairs["x"].to_numpy()[:, None], pairs["T"].to_numpy()[:, None]
+
+    # (eşsiz çift x horizon) matrisleri
+    _a, _b, _c = r + pair_x, b + pair_x, a + b + pair_x - 1
+    z = t / (alpha + pair_T + t)
+    with np.errstate(divide="ignore"):
+        ln_hyp_term = np.log(hyp2f1(_a, _b, _c, z))
+    overflow = np.isinf(ln_hyp_term)
+    if overflow.any():
+        ln_hyp_term = np.where(overflow, np.log(hyp2f1(_c - _a, _c - _b, _c, z)) + (_c - _a - _b) * np.log(1 - z),
+                               ln_hyp_term)
+    second_term = 1 - np.exp(ln_hyp_term + (r + pair_x) * np.log((alpha + pair_T) / (alpha + t + pair_T)))
+
+    # müşteri başına tek sayı
+    first_term = (a + b + x - 1) / (a - 1)
+    denominator = 1 + (x > 0) * (a / (b + np.maximum(x, 1) - 1)) * ((alpha + T) / (alpha + recency)) ** (r + x)
+    expected = (first_term / denominator)[:, None] * second_term[pair_index]
+    return pd.DataFrame(expected, index=index, columns=pd.Index(t, name="horizon"))
+
+
+# Bu fonksiyon, aylık adımların indirim ağırlıklarını hesaplar: adım x (ay, indirim oranı) matrisi.
+# Ufkun dışında kalan adımların ağırlığı 0'dır; böylece tüm (ufuk, oran) çiftleri tek matris çarpımıyla toplanır.
+def _discount_weights(months, discount_rates, factor):
+    months = np.atleast_1d(np.asarray(months, dtype="int64"))
+    discount_rates = np.atleast_1d(np.asarray(discount_rates, dtype="float64"))
+    step_numbers = np.arange(1, months.max() + 1)
+    steps = step_numbers * factor
+    # lifetimes ile aynı üs: (1 + oran) ** (i / factor), i = adım * factor
+    discount = 1 / (1 + discount_rates[None, :]) ** (steps / factor)[:, None]
+    in_horizon = step_numbers[:, None] <= months[None, :]
+    weights = (in_horizon[:, :, None] * discount[:, None, :]).reshape(len(steps), -1)
+    columns = pd.MultiIndex.from_product([months, discount_rates], names=["month", "discount_rate"])
+    return steps, weights, columns
+
+
+def discounted_expected_purchases(bgf, months, discount_rates, frequency, recency, T, freq="W"):
+    """
+    Discounted expected purchases for every (horizon in months, monthly discount rate) pair in one call:
+    the sum over months of the expected purchases in that month / (1 + rate) ** month,
+    i.e. GammaGammaFitter.customer_lifetime_value without the expected average profit factor.
+
+    Cumulative expected purchases at all monthly steps come from one expected_purchases call. The monthly
+    increments are then multiplied by a (step x horizon-rate) weight matrix, so the whole grid is one matrix product.
+
+    Parameters:
+    ----------
+    bgf: BGNBDFitter or lifetimes.BetaGeoFitter
+        Fitted model.
+    months: int or array_like
+        CLTV horizons in months.
+    discount_rates: float or array_like
+        Monthly discount rates.
+    frequency, recency, T: array_like
+        Purchase history of the customers.
+    freq: str
+        Time unit of recency and T: "W", "M", "D" or "H".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per customer, columns MultiIndex (month, discount_rate).
+
+    Example Usage:
+    --------------
+    purchases = discounted_expected_purchases(bgf, range(1, 13), [0.005, 0.01, 0.015, 0.02, 0.03],
+                                              cltv_df["frequency"], cltv_df["recency"], cltv_df["T"])
+    """
+    if freq not in FREQ_FACTORS:
+        raise ValueError(f"freq must be one of {list(FREQ_FACTORS)}, got {freq!r}")
+    steps, weights, columns = _discount_weights(months, discount_rates, FREQ_FACTORS[freq])
+    cumulative = expected_purchases(bgf, steps, frequency, recency, T)
+    per_step = np.diff(cumulative.to_numpy(), axis=1, prepend=0)
+    return pd.DataFrame(per_step @ weights, index=cumulative.index, columns=columns)
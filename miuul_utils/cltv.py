@@ -0,0 +1,544 @@
+##################################################################################
+# CLTV ENGINE : Customer Lifetime Value hesapları
+##################################################################################
+
+# 3_CRM_analytics/CLTV/cltv.py içindeki create_cltv_c, metrikleri lambda'lı bir groupby ile hesaplıyor
+# ({'Invoice': lambda x: x.nunique(), 'Quantity': lambda x: x.sum(), 'TotalPrice': lambda x: x.sum()}).
+# Buradaki versiyon aynı çıktıyı native named aggregation ile üretir,
+# frequency="hll" ile de eşsiz fatura sayısını HyperLogLog ile tahmin edebilir (bkz. hll.py).
+
+# create_cltv_p (3_CRM_analytics/CLTV_prediction/cltv_prediction.py) burada adımlarına ayrılmıştır:
+# cltv_p_metrics (veri hazırlama + recency / T / frequency / monetary) -> fit_cltv_models (BG-NBD, Gamma-Gamma)
+# -> predict_cltv (beklenen satın alma, beklenen ortalama kâr, CLTV, segment)
+
+# compress=True : BG-NBD sadece (frequency, recency, T) üçlüsüne bakar ve recency / T gün / 7 olduğundan çok müşteri aynı üçlüyü
+# paylaşır. Müşteriler eşsiz üçlülere indirgenir (compress_triples), model müşteri sayısı ağırlıklı likelihood ile kurulur,
+# tahminler üçlü başına bir kez hesaplanıp müşterilere geri dağıtılır. Sonuçlar optimizer toleransı içinde aynıdır.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# pip install lifetimes
+try:
+    from lifetimes import BetaGeoFitter, GammaGammaFitter
+    from lifetimes.utils import ConvergenceError
+except ImportError:  # lifetimes yoksa sadece create_cltv_c kullanılabilir
+    BetaGeoFitter = GammaGammaFitter = ConvergenceError = None
+
+from miuul_utils import bgnbd
+from miuul_utils.bgnbd import BGNBDFitter, discounted_expected_purchases, expected_purchases
+from miuul_utils.data_prep import retail_data_prep
+from miuul_utils.hll import DEFAULT_HLL_PRECISION, GroupedHyperLogLog
+from miuul_utils.rfm import ANALYSIS_DATE, CUSTOMER_COL, _to_shared
+
+
+SEGMENT_LABELS = ["D", "C", "B", "A"]
+
+
+# Bu fonksiyon, create_cltv_c'deki gibi veriyi temizler ve müşteri bazında total_transaction, total_unit, total_price hesaplar.
+def _cltv_c_metrics(dataframe, customer_col=CUSTOMER_COL, frequency="exact", hll_precision=DEFAULT_HLL_PRECISION):
+    # Veriyi hazırlama (iptal faturaları, Quantity <= 0 ve eksik değerler tek maskede)
+    mask = (~dataframe["Invoice"].str.contains("C", na=False) & (dataframe["Quantity"] > 0)
+            & dataframe.notna().all(axis=1))
+    dataframe = dataframe.loc[mask, ["Invoice", "Quantity", customer_col]].assign(
+        TotalPrice=dataframe.loc[mask, "Quantity"] * dataframe.loc[mask, "Price"])
+
+    if frequency == "hll":
+        cltv_c = dataframe.groupby(customer_col).agg(total_unit=("Quantity", "sum"), total_price=("TotalPrice", "sum"))
+        hll = GroupedHyperLogLog(hll_precision).update(dataframe[customer_col], dataframe["Invoice"])
+        cltv_c.insert(0, "total_transaction", hll.estimate().reindex(cltv_c.index, fill_value=0))
+    elif frequency == "exact":
+        cltv_c = dataframe.groupby(customer_col).agg(total_transaction=("Invoice", "nunique"),
+                                                     total_unit=("Quantity", "sum"),
+                                                     total_price=("TotalPrice", "sum"))
+    else:
+        raise ValueError(f"frequency must be 'exact' or 'hll', got {frequency!r}")
+    return cltv_c
+
+
+# Bu fonksiyon, create_cltv_p'deki gibi veriyi hazırlar ve haftalık recency, T, frequency, monetary (ortalama) değerlerini hesaplar.
+def cltv_p_metrics(dataframe, today_date=ANALYSIS_DATE, customer_col=CUSTOMER_COL):
+    dataframe = retail_data_prep(dataframe, cap_lower=False)
+    dataframe["TotalPrice"] = dataframe["Quantity"] * dataframe["Price"]
+
+    cltv_df = dataframe.groupby(customer_col).agg(first_date=("InvoiceDate", "min"),
+                                                  last_date=("InvoiceDate", "max"),
+                                                  frequency=("Invoice", "nunique"),
+                                                  monetary=("TotalPrice", "sum"))
+    cltv_df = pd.DataFrame({"recency": (cltv_df["last_date"] - cltv_df["first_date"]).dt.days,
+                            "T": (today_date - cltv_df["first_date"]).dt.days,
+                            "frequency": cltv_df["frequency"],
+                            "monetary": cltv_df["monetary"] / cltv_df["frequency"]})
+    cltv_df = cltv_df[(cltv_df['frequency'] > 1)].copy()
+    cltv_df["recency"] = cltv_df["recency"] / 7
+    cltv_df["T"] = cltv_df["T"] / 7
+    return cltv_df
+
+
+def compress_triples(cltv_df):
+    """
+    Collapses customers into unique (frequency, recency, T) triples, the sufficient statistics of BG-NBD.
+
+    Parameters:
+    ----------
+    cltv_df: pandas.DataFrame
+        Frame with frequency, recency and T columns (e.g. cltv_p_metrics output).
+
+    Returns:
+    -------
+    tuple
+        (triples, inverse): a DataFrame of the unique triples with a weights column (number of customers),
+        and an int array such that triples.iloc[inverse] gives back the customers' rows.
+
+    Example Usage:
+    --------------
+    triples, inverse = compress_triples(cltv_df)
+    bgf.fit(triples["frequency"], triples["recency"], triples["T"], weights=triples["weights"])
+    cltv_df["expected_purc_3_month"] = np.asarray(bgf.predict(12, triples["frequency"], triples["recency"], triples["T"]))[inverse]
+    """
+    keys = cltv_df[["frequency", "recency", "T"]]
+    inverse = keys.groupby(["frequency", "recency", "T"], sort=False).ngroup().to_numpy()
+    triples = keys.drop_duplicates().reset_index(drop=True)
+    triples["weights"] = np.bincount(inverse)
+    return triples, inverse
+
+
+# Bu fonksiyon, BG-NBD ve Gamma-Gamma modellerini create_cltv_p'deki penalizer değerleriyle kurar.
+# cache (CLTVModelCache) verilirse aynı girdi için fit tekrarlanmaz, küçük değişikliklerde önceki parametrelerden başlanır.
+# engine="numpy" : BG-NBD, lifetimes yerine miuul_utils.bgnbd.BGNBDFitter ile (analitik gradyan, L-BFGS-B) kurulur.
+# compress=True : BG-NBD eşsiz (frequency, recency, T) üçlüleri üzerinde, müşteri sayısı ağırlığıyla kurulur.
+def fit_cltv_models(cltv_df, cache=None, engine="lifetimes", compress=False):
+    if BetaGeoFitter is None:
+        raise ImportError("create_cltv_p requires lifetimes: pip install lifetimes")
+    if engine not in ("lifetimes", "numpy"):
+        raise ValueError(f"engine must be 'lifetimes' or 'numpy', got {engine!r}")
+    bgnbd_df, weights = cltv_df, None
+    if compress:
+        bgnbd_df, _ = compress_triples(cltv_df)
+        weights = bgnbd_df["weights"].to_numpy()
+    if cache is not None:
+        bgf = cache.fit_bgnbd(bgnbd_df['frequency'], bgnbd_df['recency'], bgnbd_df['T'], penalizer_coef=0.001,
+                              weights=weights, engine=engine)
+        ggf = cache.fit_gamma_gamma(cltv_df['frequency'], cltv_df['monetary'], penalizer_coef=0.01)
+        return bgf, ggf
+    bgf = BetaGeoFitter(penalizer_coef=0.001) if engine == "lifetimes" else BGNBDFitter(penalizer_coef=0.001)
+    bgf.fit(bgnbd_df['frequency'], bgnbd_df['recency'], bgnbd_df['T'], weights=weights)
+    ggf = GammaGammaFitter(penalizer_coef=0.01)
+    ggf.fit(cltv_df['frequency'], cltv_df['monetary'])
+    return bgf, ggf
+
+
+# Bu fonksiyon, kurulan modellerle beklenen satın almaları, beklenen ortalama kârı, CLTV'yi ve segmentleri hesaplar.
+# Üç ufuk (1, 4, 12 hafta) tek expected_purchases çağrısıyla hesaplanır.
+# compress=True : CLTV'deki BG-NBD tahminleri eşsiz (frequency, recency, T) üçlüleri için hesaplanıp müşterilere dağıtılır.
+def predict_cltv(cltv_df, bgf, ggf, month=3, compress=False):
+    cltv_df = cltv_df.copy()
+    horizons = {"expected_purc_1_week": 1, "expected_purc_1_month": 4, "expected_purc_3_month": 12}
+    expected = expected_purchases(bgf, list(horizons.values()), cltv_df['frequency'], cltv_df['recency'], cltv_df['T'])
+    cltv_df[list(horizons)] = expected.to_numpy()
+    cltv_df["expected_average_profit"] = ggf.conditional_expected_average_profit(cltv_df['frequency'],
+                                                                                 cltv_df['monetary'])
+    if compress:
+        triples, inverse = compress_triples(cltv_df)
+        discounted = discounted_expected_purchases(bgf, month, 0.01, triples["frequency"].to_numpy(),
+                                                   triples["recency"].to_numpy(), triples["T"].to_numpy()).to_numpy()
+        discounted = discounted[inverse, 0]
+        cltv = pd.Series(cltv_df["expected_average_profit"].to_numpy() * discounted, index=cltv_df.index, name="clv")
+    else:
+        cltv = ggf.customer_lifetime_value(bgf,
+                                           cltv_df['frequency'],
+                                           cltv_df['recency'],
+                                           cltv_df['T'],
+                                           cltv_df['monetary'],
+                                           time=month,  # ay
+                                           freq="W",  # T'nin frekans bilgisi.
+                                           discount_rate=0.01)
+    cltv_final = cltv_df.merge(cltv.reset_index(), on=cltv.index.name, how="left")
+    cltv_final["segment"] = pd.qcut(cltv_final["clv"], 4, labels=["D", "C", "B", "A"])
+    return cltv_final
+
+
+# Bu fonksiyon, birden çok CLTV ufku (ay) ve aylık indirim oranı için CLTV matrisini tek çağrıda hesaplar.
+# Her (ufuk, oran) için ggf.customer_lifetime_value çağırmak yerine tüm aylık adımlardaki beklenen satın almalar
+# bir kez hesaplanır, indirgeme (adım x ufuk-oran) ağırlık matrisiyle tek çarpımda yapılır.
+def discounted_cltv(bgf, ggf, frequency, recency, T, monetary, months=(3,), discount_rates=(0.01,), freq="W"):
+    """
+    CLTV for every (horizon in months, monthly discount rate) pair, equal to
+    ggf.customer_lifetime_value(bgf, frequency, recency, T, monetary, time=month, freq=freq, discount_rate=rate)
+    for each pair, computed in one pass.
+
+    Parameters:
+    ----------
+    bgf: lifetimes.BetaGeoFitter or BGNBDFitter
+        Fitted BG-NBD model.
+    ggf: lifetimes.GammaGammaFitter
+        Fitted Gamma-Gamma model.
+    frequency, recency, T, monetary: array_like
+        Customer metrics (see cltv_p_metrics).
+    months: int or array_like
+        CLTV horizons in months.
+    discount_rates: float or array_like
+        Monthly discount rates.
+    freq: str
+        Time unit of recency and T: "W", "M", "D" or "H".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per customer, columns MultiIndex (month, discount_rate).
+
+    Example Usage:
+    --------------
+    cltv_df = cltv_p_metrics(df_)
+    bgf, ggf = fit_cltv_models(cltv_df)
+    grid = discounted_cltv(bgf, ggf, cltv_df["frequency"], cltv_df["recency"], cltv_df["T"], cltv_df["monetary"],
+                           months=range(1, 13), discount_rates=[0.005, 0.01, 0.015, 0.02, 0.03])
+    grid[(6, 0.01)]          # 6 aylık, %1 indirimli CLTV
+    grid.sum()               # her senaryonun toplam CLTV'si
+    """
+    purchases = discounted_expected_purchases(bgf, months, discount_rates, frequency, recency, T, freq)
+    profit = np.asarray(ggf.conditional_expected_average_profit(frequency, monetary), dtype="float64")
+    return purchases.mul(profit, axis=0)
+
+
+def create_cltv_p(dataframe, month=3, today_date=ANALYSIS_DATE, customer_col=CUSTOMER_COL, cache=None,
+                  engine="lifetimes", compress=False):
+    """
+    Same output as create_cltv_p in 3_CRM_analytics/CLTV_prediction/cltv_prediction.py,
+    split into cltv_p_metrics, fit_cltv_models and predict_cltv.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Raw Online Retail II transactions. The input frame is not modified.
+    month: int
+        CLTV horizon in months.
+    today_date: datetime
+        Analysis date.
+    customer_col: str
+        Customer id column.
+    cache: CLTVModelCache, optional
+        Model cache (miuul_utils/model_cache.py); fitted parameters are reused for unchanged inputs.
+        None fits the models without writing anything to disk.
+    engine: str
+        "lifetimes" (lifetimes.BetaGeoFitter) or "numpy" (miuul_utils.bgnbd.BGNBDFitter, same parameters
+        within optimizer tolerance, >10x faster fit).
+    compress: bool
+        Fit BG-NBD on the unique (frequency, recency, T) triples weighted by customer counts and broadcast
+        its predictions back to the customers (see compress_triples).
+
+    Returns:
+    -------
+    pandas.DataFrame
+        customer id, recency, T, frequency, monetary, expected purchases, expected_average_profit, clv, segment.
+
+    Example Usage:
+    --------------
+    cltv_final = create_cltv_p(df_, month=6)
+    cltv_final = create_cltv_p(df_, month=6, cache=CLTVModelCache(dataset="online_retail"), engine="numpy", compress=True)
+    """
+    cltv_df = cltv_p_metrics(dataframe, today_date, customer_col)
+    bgf, ggf = fit_cltv_models(cltv_df, cache, engine, compress)
+    return predict_cltv(cltv_df, bgf, ggf, month, compress)
+
+
+def create_cltv_c(dataframe, profit=0.10, customer_col=CUSTOMER_COL, frequency="exact",
+                  hll_precision=DEFAULT_HLL_PRECISION):
+    """
+    Same output as create_cltv_c in 3_CRM_analytics/CLTV/cltv.py, computed with native aggregations.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Raw Online Retail II transactions. The input frame is not modified.
+    profit: float
+        Profit margin applied to total_price.
+    customer_col: str
+        Customer id column.
+    frequency: str
+        "exact" for Invoice.nunique(), "hll" for a HyperLogLog estimate of total_transaction.
+    hll_precision: int
+        HyperLogLog precision, only used with frequency="hll".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        total_transaction, total_unit, total_price, avg_order_value, purchase_frequency,
+        profit_margin, customer_value, cltv, segment columns indexed by customer id.
+
+    Example Usage:
+    --------------
+    cltv_c = create_cltv_c(df_)
+    cltv_c = create_cltv_c(df_, frequency="hll", hll_precision=12)
+    """
+    cltv_c = _cltv_c_metrics(dataframe, customer_col, frequency, hll_precision)
+
+    # avg_order_value
+    cltv_c['avg_order_value'] = cltv_c['total_price'] / cltv_c['total_transaction']
+    # purchase_frequency
+    cltv_c["purchase_frequency"] = cltv_c['total_transaction'] / cltv_c.shape[0]
+    # repeat rate & churn rate
+    repeat_rate = cltv_c[cltv_c.total_transaction > 1].shape[0] / cltv_c.shape[0]
+    churn_rate = 1 - repeat_rate
+    # profit_margin
+    cltv_c['profit_margin'] = cltv_c['total_price'] * profit
+    # Customer Value
+    cltv_c['customer_value'] = (cltv_c['avg_order_value'] * cltv_c["purchase_frequency"])
+    # Customer Lifetime Value
+    cltv_c['cltv'] = (cltv_c['customer_value'] / churn_rate) * cltv_c['profit_margin']
+    # Segment
+    cltv_c["segment"] = pd.qcut(cltv_c["cltv"], 4, labels=SEGMENT_LABELS)
+
+    return cltv_c
+
+
+# Bu fonksiyon, sıralı bir dizinin quantile'larını np.quantile(method="linear") ile aynı formülle hesaplar (tekrar sıralamadan).
+def _sorted_quantiles(sorted_values, q):
+    virtual = np.asarray(q) * (len(sorted_values) - 1)
+    previous = np.floor(virtual).astype("int64")
+    following = np.minimum(previous + 1, len(sorted_values) - 1)
+    gamma = virtual - previous
+    below, above = sorted_values[previous], sorted_values[following]
+    diff = above - below
+    return np.where(gamma >= 0.5, above - diff * (1 - gamma), below + diff * gamma)
+
+
+def cltv_c_scenarios(dataframe, profits, customer_col=CUSTOMER_COL, frequency="exact",
+                     hll_precision=DEFAULT_HLL_PRECISION):
+    """
+    create_cltv_c for many profit margins at once: the data is cleaned and aggregated once,
+    CLTV is a customers x scenarios matrix and the segments of all scenarios come from a single sort.
+
+    CLTV is linear in the profit margin (cltv = customer_value / churn_rate * total_price * profit),
+    so every scenario column is one broadcasted multiplication. Quartile segments are computed with
+    the same edges as pd.qcut(cltv, 4) from the one sorted order of the margin-free CLTV.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Raw Online Retail II transactions. The input frame is not modified.
+    profits: array-like
+        Profit margins, e.g. np.linspace(0.05, 0.24, 20).
+    customer_col: str
+        Customer id column.
+    frequency: str
+        "exact" or "hll", see create_cltv_c.
+    hll_precision: int
+        HyperLogLog precision, only used with frequency="hll".
+
+    Returns:
+    -------
+    tuple of pandas.DataFrame
+        cltv: customers x scenarios (columns = profit margins),
+        segments: customers x scenarios with D / C / B / A labels
+        (equal to create_cltv_c(dataframe, profit)["cltv"] / ["segment"] for each margin).
+
+    Example Usage:
+    --------------
+    cltv, segments = cltv_c_scenarios(df_, np.round(np.linspace(0.05, 0.24, 20), 2))
+    segments[0.10].value_counts()
+    """
+    profits = np.atleast_1d(np.asarray(profits, dtype="float64"))
+    cltv_c = _cltv_c_metrics(dataframe, customer_col, frequency, hll_precision)
+
+    n_customers = cltv_c.shape[0]
+    total_transaction = cltv_c["total_transaction"].to_numpy(dtype="float64")
+    total_price = cltv_c["total_price"].to_numpy(dtype="float64")
+    churn_rate = 1 - (total_transaction > 1).sum() / n_customers
+    # create_cltv_c'deki işlem sırası korunur: (avg_order_value * purchase_frequency / churn_rate) * (total_price * profit)
+    customer_value = (total_price / total_transaction) * (total_transaction / n_customers)
+    cltv = (customer_value / churn_rate)[:, None] * (total_price[:, None] * profits[None, :])
+
+    # Tek sıralama: marjsız CLTV'ye göre. Pozitif marjlarda sıra aynı kalır, negatif marjlarda ters döner.
+    order = np.argsort((customer_value / churn_rate) * total_price, kind="stable")
+    segments = {}
+    for j, profit in enumerate(profits):
+        ordered = cltv[order, j] if profit >= 0 else cltv[order[::-1], j]
+        edges = _sorted_quantiles(ordered, [0.25, 0.5, 0.75])
+        codes = np.searchsorted(edges, cltv[:, j], side="left")     # pd.qcut gibi sağdan kapalı aralıklar
+        segments[profit] = pd.Categorical.from_codes(codes, SEGMENT_LABELS, ordered=True)
+
+    columns = pd.Index(profits, name="profit")
+    return (pd.DataFrame(cltv, index=cltv_c.index, columns=columns),
+            pd.DataFrame(segments, index=cltv_c.index).set_axis(columns, axis=1))
+
+
+
+##################################################################################
+# Bootstrap CLTV : predicted CLTV için güven aralıkları
+##################################################################################
+
+# create_cltv_p'deki clv bir nokta tahmini. Pazarlama, A segmentine bütçe ayırmadan önce %90'lık aralık istiyor.
+# bootstrap_cltv:
+# - Müşteriler iadeli örneklenir. Örneklem kopyalanmaz: her müşterinin örneklemde kaç kez çıktığı (0, 1, 2, ...)
+#   likelihood ağırlığı olarak verilir (lifetimes ve BGNBDFitter weights destekliyor).
+# - Her tekrarda BG-NBD ve Gamma-Gamma yeniden kurulur. Optimizasyon tüm veriyle kurulan modelin parametrelerinden başlar
+#   (warm start): bootstrap parametreleri nokta tahminine yakın olduğundan birkaç iterasyonda yakınsar.
+# - Tekrarlar process havuzunda batch'ler halinde çalışır. frequency / recency / T / monetary dizileri shared memory'de,
+#   worker'lara sadece seed'ler gider. Her tekrarın seed'i sabit: sonuç worker sayısından bağımsızdır.
+# - Warm start'tan yakınsamayan bir tekrar bir kez varsayılan başlangıç noktasından (cold start) yeniden kurulur.
+#   Yine yakınsamazsa tekrar atlanır ve sayılır (attrs["n_dropped"]); sadece hiçbir tekrar yakınsamazsa hata verilir.
+# - progress(done, total, elapsed) her batch sonunda çağrılır, False döndürürse bekleyen batch'ler iptal edilir.
+#   time_budget (saniye) dolunca da aynısı yapılır; çalışmakta olan batch'ler tamamlanır. Quantile'lar biten tekrarlardan hesaplanır.
+# Bellek: tekrar sayısı x müşteri sayısı x 4 byte (200 tekrar, 100K müşteri: 80 MB).
+
+# Bu fonksiyon, bir bootstrap tekrarının BG-NBD ve Gamma-Gamma modellerini kurar. Önce warm start, yakınsamazsa bir kez
+# cold start (initial_params=None) denenir. İkisi de yakınsamazsa None döner.
+def _fit_replicate(frequency, recency, T, monetary, weights, engine, bgnbd_start, gamma_gamma_start):
+    for bgnbd_initial, gamma_gamma_initial in [(bgnbd_start, gamma_gamma_start), (None, None)]:
+        bgf = BetaGeoFitter(penalizer_coef=0.001) if engine == "lifetimes" else BGNBDFitter(penalizer_coef=0.001)
+        ggf = GammaGammaFitter(penalizer_coef=0.01)
+        try:
+            bgf.fit(frequency, recency, T, weights=weights, initial_params=bgnbd_initial)
+            ggf.fit(frequency, monetary, weights=weights, initial_params=gamma_gamma_initial)
+        except (ConvergenceError, bgnbd.ConvergenceError):
+            continue
+        return bgf, ggf
+    return None
+
+
+# Bu fonksiyon, verilen seed'lerle bootstrap tekrarlarını çalıştırır.
+# (yakınsayan tekrarların tekrar x müşteri CLTV matrisi, yakınsamayan tekrar sayısı) döndürür.
+def _bootstrap_replicates(columns, seeds, month, engine, bgnbd_params, gamma_gamma_params):
+    frequency, recency, T, monetary = (columns[column] for column in ["frequency", "recency", "T", "monetary"])
+    n_customers = len(frequency)
+    # lifetimes'ın başlangıç noktası uzayı: log-parametreler, alpha 1 / max(T) ile ölçekli
+    r, alpha, a, b = bgnbd_params
+    bgnbd_start = np.log([r, alpha / T.max(), a, b])
+    gamma_gamma_start = np.log(gamma_gamma_params)
+
+    clv = np.empty((len(seeds), n_customers), dtype="float32")
+    n_fitted = 0
+    for seed in seeds:
+        weights = np.bincount(np.random.default_rng(seed).integers(0, n_customers, n_customers), minlength=n_customers)
+        models = _fit_replicate(frequency, recency, T, monetary, weights, engine, bgnbd_start, gamma_gamma_start)
+        if models is None:
+            continue
+        bgf, ggf = models
+        profit = np.asarray(ggf.conditional_expected_average_profit(frequency, monetary))
+        clv[n_fitted] = profit * discounted_expected_purchases(bgf, month, 0.01, frequency, recency, T).to_numpy()[:, 0]
+        n_fitted += 1
+    return clv[:n_fitted], len(seeds) - n_fitted
+
+
+# Worker: shared memory buffer'larına bağlanır, kendi seed'leriyle bootstrap tekrarlarını çalıştırır.
+def _bootstrap_worker(specs, seeds, month, engine, bgnbd_params, gamma_gamma_params):
+    handles, columns = [], {}
+    try:
+        for column, (name, dtype, length) in specs.items():
+            shm = shared_memory.SharedMemory(name=name)
+            handles.append(shm)
+            columns[column] = np.ndarray(length, dtype=dtype, buffer=shm.buf).copy()
+    finally:
+        for shm in handles:
+            shm.close()
+    return _bootstrap_replicates(columns, seeds, month, engine, bgnbd_params, gamma_gamma_params)
+
+
+# Bu fonksiyon, progress hook'unu çağırır; hook False döndürürse veya süre bütçesi dolduysa True döndürür (bootstrap durur).
+def _bootstrap_should_stop(progress, done, total, start, time_budget):
+    elapsed = time.perf_counter() - start
+    if progress is not None and progress(done, total, elapsed) is False:
+        return True
+    return time_budget is not None and elapsed >= time_budget
+
+
+def bootstrap_cltv(cltv_df, month=3, n_bootstrap=200, quantiles=(0.05, 0.5, 0.95), engine="numpy", max_workers=None,
+                   seed=42, time_budget=None, progress=None):
+    """
+    Bootstrap confidence intervals for the predicted CLTV of create_cltv_p.
+
+    Customers are resampled with replacement (as likelihood weights), BG-NBD and Gamma-Gamma are refitted
+    from the full-data parameters in a process pool, and the CLTV of every customer is predicted with each refit.
+
+    Parameters:
+    ----------
+    cltv_df: pandas.DataFrame
+        cltv_p_metrics output (frequency, recency, T, monetary in weeks).
+    month: int
+        CLTV horizon in months.
+    n_bootstrap: int
+        Number of bootstrap replicates.
+    quantiles: tuple
+        Quantiles of the bootstrap CLTV distribution per customer, e.g. (0.05, 0.95) for a 90% interval.
+    engine: str
+        BG-NBD fitter of the refits: "numpy" (BGNBDFitter) or "lifetimes".
+    max_workers: int, optional
+        Number of worker processes. Defaults to the number of CPUs. With 1, everything runs in this process.
+    seed: int
+        Seed of the resampling. Results do not depend on max_workers.
+    time_budget: float, optional
+        Seconds, counted from the call. When exceeded, pending replicates are cancelled (running batches finish)
+        and the quantiles use the finished ones.
+    progress: callable, optional
+        Called as progress(done, n_bootstrap, elapsed_seconds) after each batch. Returning False stops the bootstrap.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        clv (full-data point estimate) and one clv_<q> column per quantile, indexed like cltv_df.
+        attrs["n_bootstrap"] is the number of finished replicates, attrs["n_dropped"] the number of replicates
+        dropped because neither the warm-started nor a cold-started refit converged (lifetimes' ConvergenceError
+        is raised only if all of them were dropped).
+
+    Example Usage:
+    --------------
+    cltv_df = cltv_p_metrics(df_)
+    intervals = bootstrap_cltv(cltv_df, n_bootstrap=500, quantiles=(0.05, 0.95), time_budget=30 * 60,
+                               progress=lambda done, total, elapsed: print(f"{done}/{total} {elapsed:.0f} sn"))
+    """
+    if engine not in ("lifetimes", "numpy"):
+        raise ValueError(f"engine must be 'lifetimes' or 'numpy', got {engine!r}")
+    start = time.perf_counter()
+    bgf, ggf = fit_cltv_models(cltv_df, engine=engine)
+    columns = {column: cltv_df[column].to_numpy(dtype="float64") for column in ["frequency", "recency", "T", "monetary"]}
+    point = (np.asarray(ggf.conditional_expected_average_profit(columns["frequency"], columns["monetary"]))
+             * discounted_expected_purchases(bgf, month, 0.01, columns["frequency"], columns["recency"],
+                                             columns["T"]).to_numpy()[:, 0])
+
+    # Worker başına birkaç batch: progress sık güncellenir, süre bütçesi dolunca iptal edilecek iş kalır
+    seeds = np.random.SeedSequence(seed).spawn(n_bootstrap)
+    batch_size = max(1, n_bootstrap // (4 * (max_workers or os.cpu_count() or 1)))
+    batches = [seeds[i:i + batch_size] for i in range(0, n_bootstrap, batch_size)]
+    args = (month, engine, bgf.params_[["r", "alpha", "a", "b"]].to_numpy(), ggf.params_[["p", "q", "v"]].to_numpy())
+
+    results = []
+    if max_workers == 1:
+        for batch in batches:
+            results.append(_bootstrap_replicates(columns, batch, *args))
+            if _bootstrap_should_stop(progress, sum(len(clv) + n_dropped for clv, n_dropped in results), n_bootstrap,
+                                      start, time_budget):
+                break
+    else:
+        shared = {column: _to_shared(values) for column, values in columns.items()}
+        specs = {column: spec for column, (_, spec) in shared.items()}
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_bootstrap_worker, specs, batch, *args) for batch in batches]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    if _bootstrap_should_stop(progress, sum(len(clv) + n_dropped for clv, n_dropped in results),
+                                              n_bootstrap, start, time_budget):
+                        for pending in futures:
+                            pending.cancel()
+                        break
+        finally:
+            for shm, _ in shared.values():
+                shm.close()
+                shm.unlink()
+
+    clv = np.concatenate([clv for clv, _ in results])
+    n_dropped = sum(n_dropped for _, n_dropped in results)
+    if len(clv) == 0:
+        raise ConvergenceError(f"None of the {n_dropped} bootstrap replicates converged")
+    intervals = pd.DataFrame({"clv": point}, index=cltv_df.index)
+    for q, values in zip(quantiles, np.quantile(clv, quantiles, axis=0)):
+        intervals[f"clv_{q:g}"] = values
+    intervals.attrs["n_bootstrap"] = len(clv)
+    intervals.attrs["n_dropped"] = n_dropped
+    return intervals
@@ -0,0 +1,308 @@
+##################################################################################
+# CLTV MODEL : Kurulmuş BG-NBD + Gamma-Gamma modelinin saklanması ve yeni müşterilerin skorlanması
+##################################################################################
+
+# create_clv_df modelleri kurup tahminleri yazdıktan sonra modeller kayboluyor. Gün içinde gelen yeni bir müşteri
+# batch'ini skorlamak için her şeyi baştan fit etmek gerekiyor.
+
+# CLTVModel, kurulmuş modellerin dondurulmuş halidir:
+# - BG-NBD (r, alpha, a, b) ve Gamma-Gamma (p, q, v) parametreleri, CLTV ayarları (ay, indirim oranı, tahmin ufukları)
+#   ve eğitim verisindeki CLTV çeyrek sınırları (D / C / B / A segmentleri için) küçük bir JSON dosyasına yazılır.
+# - score(batch) yeni (frequency, recency, T, monetary) dizilerine bu parametreleri chunk chunk, tamamen vektörel uygular:
+#   tüm ufuklar ve CLTV'nin aylık adımları tek expected_purchases çağrısında hesaplanır. lifetimes gerekmez.
+# - Yeni müşterilerin segmenti eğitimdeki çeyrek sınırlarına göre verilir (batch'in kendi dağılımına göre değil),
+#   böylece aynı müşteri hangi batch'te skorlanırsa skorlansın aynı segmenti alır.
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from miuul_utils.bgnbd import BGNBD_PARAMS, FREQ_FACTORS, BGNBDFitter, _discount_weights, expected_purchases
+from miuul_utils.cltv import SEGMENT_LABELS, fit_cltv_models
+from miuul_utils.model_cache import GAMMA_GAMMA_PARAMS
+from miuul_utils.rfm import OTHER_PARTITION, _to_shared
+
+
+ARTIFACT_VERSION = 1
+
+
+class CLTVModel:
+    """
+    Frozen BG-NBD + Gamma-Gamma CLTV model that can be saved to disk and applied to new customers.
+
+    Parameters:
+    ----------
+    bgnbd_params: dict
+        r, alpha, a, b.
+    gamma_gamma_params: dict
+        p, q, v.
+    month: int
+        CLTV horizon in months.
+    discount_rate: float
+        Monthly discount rate.
+    freq: str
+        Time unit of recency and T: "W", "M", "D" or "H" (as in customer_lifetime_value).
+    horizons: dict, optional
+        {column name: horizon} of the expected purchase columns, horizons in the time unit of T.
+    segment_edges: list, optional
+        Inner CLTV quartile edges of the training customers. Without them score() returns no segment column.
+
+    Example Usage:
+    --------------
+    model = CLTVModel.from_fitted(bgf, ggf, month=6, horizons={"exp_sales_3_month": 12, "exp_sales_6_month": 24},
+                                  training_clv=clv_df["clv"])
+    model.save("models/flo_cltv.json")
+
+    model = CLTVModel.load("models/flo_cltv.json")
+    scores = model.score(new_customers, recency="recency_clv_weekly", T="T_weekly", monetary="monetary_clv_avg")
+    """
+
+    def __init__(self, bgnbd_params, gamma_gamma_params, month=3, discount_rate=0.01, freq="W", horizons=None,
+                 segment_edges=None):
+        if freq not in FREQ_FACTORS:
+            raise ValueError(f"freq must be one of {list(FREQ_FACTORS)}, got {freq!r}")
+        self.bgnbd_params = {name: float(bgnbd_params[name]) for name in BGNBD_PARAMS}
+        self.gamma_gamma_params = {name: float(gamma_gamma_params[name]) for name in GAMMA_GAMMA_PARAMS}
+        self.month = int(month)
+        self.discount_rate = float(discount_rate)
+        self.freq = freq
+        self.horizons = dict(horizons or {})
+        self.segment_edges = None if segment_edges is None else [float(edge) for edge in segment_edges]
+        self._bgf = BGNBDFitter()
+        self._bgf.params_ = pd.Series(self.bgnbd_params)[BGNBD_PARAMS]
+
+    def __repr__(self):
+        params = ", ".join(f"{name}: {value:.3g}" for name, value in {**self.bgnbd_params, **self.gamma_gamma_params}.items())
+        return f"<CLTVModel: {params}, month: {self.month}>"
+
+    @classmethod
+    def from_fitted(cls, bgf, ggf, month=3, discount_rate=0.01, freq="W", horizons=None, training_clv=None):
+        """
+        Freezes fitted models (lifetimes.BetaGeoFitter or BGNBDFitter, and lifetimes.GammaGammaFitter).
+        If training_clv is given, its quartiles become the segment edges (same segments as pd.qcut(training_clv, 4)).
+
+        Returns:
+        -------
+        CLTVModel
+        """
+        segment_edges = None
+        if training_clv is not None:
+            segment_edges = np.quantile(np.asarray(training_clv, dtype="float64"), [0.25, 0.5, 0.75])
+        return cls(bgf.params_, ggf.params_, month, discount_rate, freq, horizons, segment_edges)
+
+    def to_dict(self):
+        return {"version": ARTIFACT_VERSION,
+                "bgnbd_params": self.bgnbd_params,
+                "gamma_gamma_params": self.gamma_gamma_params,
+                "month": self.month,
+                "discount_rate": self.discount_rate,
+                "freq": self.freq,
+                "horizons": self.horizons,
+                "segment_edges": self.segment_edges}
+
+    # Bu fonksiyon, modeli önce geçici bir dosyaya yazar, sonra atomik olarak yerine taşır.
+    def save(self, path):
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            artifact = json.load(file)
+        if artifact.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported CLTV model artifact version: {artifact.get('version')}")
+        artifact.pop("version")
+        return cls(**artifact)
+
+    # Bu fonksiyon, Gamma-Gamma beklenen ortalama kârını hesaplar. (lifetimes conditional_expected_average_profit ile aynı)
+    def _expected_average_profit(self, frequency, monetary):
+        p, q, v = (self.gamma_gamma_params[name] for name in GAMMA_GAMMA_PARAMS)
+        individual_weight = p * frequency / (p * frequency + q - 1)
+        population_mean = v * p / (q - 1)
+        return (1 - individual_weight) * population_mean + individual_weight * monetary
+
+    # Bu fonksiyon, tek bir chunk'ı skorlar: tahmin ufukları ve CLTV'nin aylık adımları tek matriste hesaplanır.
+    def _score_chunk(self, frequency, recency, T, monetary):
+        steps, weights, _ = _discount_weights(self.month, self.discount_rate, FREQ_FACTORS[self.freq])
+        horizons = np.asarray(list(self.horizons.values()), dtype="float64")
+        expected = expected_purchases(self._bgf, np.concatenate([horizons, steps]), frequency, recency, T).to_numpy()
+
+        scores = dict(zip(self.horizons, expected[:, :len(horizons)].T))
+        profit = self._expected_average_profit(frequency, monetary)
+        # kümülatif beklenen satın almalardan aylık artışlar, indirgenmiş toplam (customer_lifetime_value ile aynı)
+        per_step = np.diff(expected[:, len(horizons):], axis=1, prepend=0)
+        scores["expected_average_profit"] = profit
+        scores["clv"] = profit * (per_step @ weights[:, 0])
+        return scores
+
+    def score(self, batch, frequency="frequency", recency="recency", T="T", monetary="monetary", chunksize=1_000_000):
+        """
+        Applies the frozen parameters to new customers.
+
+        Parameters:
+        ----------
+        batch: pandas.DataFrame
+            New customers, in the same units as the training data (e.g. weeks).
+        frequency, recency, T, monetary: str
+            Column names in batch.
+        chunksize: int
+            Customers per vectorized chunk (bounds the memory of the customers x horizons matrices).
+
+        Returns:
+        -------
+        pandas.DataFrame
+            Expected purchase columns (horizons), expected_average_profit, clv and segment (if the model has
+            segment edges), indexed like batch.
+        """
+        values = {column: batch[name].to_numpy(dtype="float64")
+                  for column, name in [("frequency", frequency), ("recency", recency), ("T", T), ("monetary", monetary)]}
+        chunks = [self._score_chunk(*(values[column][start:start + chunksize]
+                                      for column in ["frequency", "recency", "T", "monetary"]))
+                  for start in range(0, len(batch), chunksize)]
+        columns = list(self.horizons) + ["expected_average_profit", "clv"]
+        scores = pd.DataFrame({column: np.concatenate([chunk[column] for chunk in chunks]) if chunks else np.empty(0)
+                               for column in columns}, index=batch.index)
+        if self.segment_edges is not None:
+            scores["segment"] = self.segment(scores["clv"])
+        return scores
+
+    # Bu fonksiyon, CLTV değerlerini eğitimdeki çeyrek sınırlarıyla D / C / B / A segmentlerine ayırır.
+    # pd.qcut gibi sağdan kapalı aralıklar; eğitim aralığının dışındaki değerler D / A'ya düşer.
+    def segment(self, clv):
+        codes = np.searchsorted(self.segment_edges, np.asarray(clv, dtype="float64"), side="left")
+        return pd.Categorical.from_codes(codes, SEGMENT_LABELS, ordered=True)
+
+
+
+##################################################################################
+# Grup bazında CLTV : kanal (order_channel) veya başka bir sütun bazında paralel modeller
+##################################################################################
+
+# FLO'da kanallar (Android App, Mobile, Desktop, Ios App) çok farklı davranıyor, create_clv_df ise tek global model kuruyor.
+# fit_cltv_models_by_group:
+# - Müşterileri grup koduna göre bir kez sıralar: her grup tek bir ardışık dilim olur.
+# - frequency / recency / T / monetary dizilerini shared memory'ye yazar. Worker process'ler buffer'ları kopyalamadan açar,
+#   sadece kendi dilimlerini okur; process'lere sadece dilim sınırları gider (create_rfm_partitioned ile aynı yapı).
+# - Her worker kendi grubunun BG-NBD + Gamma-Gamma modellerini kurar, CLTVModel ile skorlar, segmentleri grubun kendi
+#   CLTV çeyreklerine göre verir. Sonuçlar tek frame'de, girdi sırasıyla birleşir; grup modelleri de döndürülür.
+# - Az müşterili gruplar "Other" altında birlikte modellenir (birkaç müşteriyle BG-NBD kurulamaz).
+
+# Bu fonksiyon, bir grubun modellerini kurar ve müşterilerini skorlar; model sözlüğünü ve skorları döndürür.
+def _fit_score_group(columns, engine, month, discount_rate, horizons):
+    group = pd.DataFrame(columns)
+    bgf, ggf = fit_cltv_models(group, engine=engine)
+    model = CLTVModel.from_fitted(bgf, ggf, month, discount_rate, horizons=horizons)
+    scores = model.score(group)
+    model.segment_edges = np.quantile(scores["clv"].to_numpy(), [0.25, 0.5, 0.75]).tolist()
+    scores["segment"] = model.segment(scores["clv"])
+    return model.to_dict(), scores
+
+
+# Worker: shared memory buffer'larına bağlanır, [start, end) dilimindeki grubun modellerini kurar.
+def _cltv_group_worker(specs, start, end, engine, month, discount_rate, horizons):
+    handles, columns = [], {}
+    try:
+        for column, (name, dtype, length) in specs.items():
+            shm = shared_memory.SharedMemory(name=name)
+            handles.append(shm)
+            columns[column] = np.ndarray(length, dtype=dtype, buffer=shm.buf)[start:end].copy()
+    finally:
+        for shm in handles:
+            shm.close()
+    return _fit_score_group(columns, engine, month, discount_rate, horizons)
+
+
+def fit_cltv_models_by_group(cltv_df, by, month=3, horizons=None, discount_rate=0.01, engine="numpy",
+                             max_workers=None, min_customers=100, frequency="frequency", recency="recency", T="T",
+                             monetary="monetary"):
+    """
+    Fits one BG-NBD + Gamma-Gamma model per group (e.g. order_channel) in a process pool over shared-memory columns
+    and merges the per-group predictions and segments into one frame.
+
+    Parameters:
+    ----------
+    cltv_df: pandas.DataFrame
+        One row per customer with frequency, recency, T and monetary columns (e.g. cltv_p_metrics output).
+    by: str or pandas.Series
+        Grouping column of cltv_df, or group labels aligned with it.
+    month: int
+        CLTV horizon in months.
+    horizons: dict, optional
+        {column name: horizon} of the expected purchase columns. Defaults to the 1 / 4 / 12 week columns of create_cltv_p.
+    discount_rate: float
+        Monthly discount rate.
+    engine: str
+        BG-NBD fitter: "numpy" (BGNBDFitter) or "lifetimes".
+    max_workers: int, optional
+        Number of worker processes. Defaults to the number of CPUs. With 1, everything runs in this process.
+    min_customers: int
+        Groups with fewer customers are modelled together as one "Other" group.
+    frequency, recency, T, monetary: str
+        Column names in cltv_df.
+
+    Returns:
+    -------
+    tuple
+        (scores, models): scores has the group, the expected purchase columns, expected_average_profit, clv and
+        segment (quartiles within the group), indexed and ordered like cltv_df. models is {group: CLTVModel}.
+
+    Example Usage:
+    --------------
+    clv_df["order_channel"] = df["order_channel"]
+    scores, models = fit_cltv_models_by_group(clv_df, "order_channel", month=6,
+                                              horizons={"exp_sales_3_month": 12, "exp_sales_6_month": 24},
+                                              recency="recency_clv_weekly", T="T_weekly", monetary="monetary_clv_avg")
+    models["Mobile"].save("models/flo_cltv_mobile.json")
+    """
+    if horizons is None:
+        horizons = {"expected_purc_1_week": 1, "expected_purc_1_month": 4, "expected_purc_3_month": 12}
+    group_name = by if isinstance(by, str) else (by.name or "group")
+    groups = (cltv_df[by] if isinstance(by, str) else pd.Series(np.asarray(by), index=cltv_df.index)).astype(str)
+    customers_per_group = groups.value_counts()
+    small = customers_per_group.index[customers_per_group < min_customers]
+    groups = groups.where(~groups.isin(small), OTHER_PARTITION)
+
+    # Grup koduna göre tek sıralama: her grup [start, end) aralığında ardışık satırlar
+    group_codes, group_names = pd.factorize(groups, sort=True)
+    order = np.argsort(group_codes, kind="stable")
+    bounds = np.searchsorted(group_codes[order], np.arange(len(group_names) + 1))
+    columns = {column: cltv_df[name].to_numpy(dtype="float64")[order]
+               for column, name in [("frequency", frequency), ("recency", recency), ("T", T), ("monetary", monetary)]}
+    args = (engine, month, discount_rate, horizons)
+
+    # Büyük gruplar önce: en uzun iş havuzun sonunda tek başına kalmasın
+    jobs = sorted(range(len(group_names)), key=lambda i: bounds[i] - bounds[i + 1])
+    results = {}
+    if max_workers == 1:
+        for i in jobs:
+            results[group_names[i]] = _fit_score_group({column: values[bounds[i]:bounds[i + 1]]
+                                                        for column, values in columns.items()}, *args)
+    else:
+        shared = {column: _to_shared(values) for column, values in columns.items()}
+        specs = {column: spec for column, (_, spec) in shared.items()}
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {group_names[i]: executor.submit(_cltv_group_worker, specs, bounds[i], bounds[i + 1], *args)
+                           for i in jobs}
+                results = {name: future.result() for name, future in futures.items()}
+        finally:
+            for shm, _ in shared.values():
+                shm.close()
+                shm.unlink()
+
+    # Gruplar sıralı dilimlerdi: birleştirip girdi sırasına geri çevirelim
+    sorted_scores = pd.concat([results[name][1] for name in group_names], ignore_index=True)
+    sorted_scores.insert(0, group_name, group_names[group_codes[order]])
+    scores = sorted_scores.iloc[np.argsort(order)].set_axis(cltv_df.index)
+    models = {name: CLTVModel(**{key: value for key, value in results[name][0].items() if key != "version"})
+              for name in group_names}
+    return scores, models
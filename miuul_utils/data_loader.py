@@ -0,0 +1,325 @@
+##################################################################################
+# DATA LOADER : Büyük veri setlerini hızlı okumak için ortak yükleme fonksiyonları
+##################################################################################
+
+# online_retail_II.xlsx (~1M satır) her çalıştırmada pd.read_excel ile okunduğunda, openpyxl parse işlemi dakikalar sürüyor.
+# Bu modül her sheet'i ilk okumada tiplendirilmiş bir Arrow (Feather v2) dosyasına çevirir,
+# sonraki çalıştırmalarda ise bu dosyayı memory-map ile açar.
+
+# Cache anahtarı: workbook'un dosya boyutu + son değiştirilme zamanı (mtime). Excel dosyası değişirse cache otomatik yenilenir.
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# pip install pyarrow
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow yoksa cache devre dışı kalır, pd.read_excel kullanılır
+    feather = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow yoksa parquet dosyaları chunk chunk okunamaz
+    pq = None
+
+
+DEFAULT_CACHE_DIR_NAME = ".miuul_cache"
+
+# online_retail_II.xlsx içindeki sheet'ler. (1-9 Aralık 2010 arasındaki faturalar iki sheet'te de yer alıyor)
+RETAIL_SHEETS = ("Year 2009-2010", "Year 2010-2011")
+
+# Online Retail II sütunlarının cache'te tutulacağı tipler.
+# Invoice ve StockCode Excel'de int ve str karışık gelir (örn. 489434 ve "C489449"), Arrow'a yazabilmek için str yapıyoruz.
+RETAIL_DTYPES = {"Invoice": "str",
+                 "StockCode": "str",
+                 "Quantity": "int64",
+                 "Price": "float64",
+                 "Customer ID": "float64",
+                 "Country": "category"}
+
+
+# Bu fonksiyon, kaynak dosya + etiket için cache dosyasının yolunu döndürür. (dosya boyutu ve mtime dosya adına gömülür)
+def _cache_path(path, tag, cache_dir):
+    stat = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    tag_slug = re.sub(r"[^0-9A-Za-z]+", "_", str(tag)).strip("_")
+    file_name = f"{stem}__{tag_slug}__{stat.st_size}_{stat.st_mtime_ns}.arrow"
+    return os.path.join(cache_dir, file_name), f"{stem}__{tag_slug}__"
+
+
+# Bu fonksiyon, cache_dir verilmemişse kaynak dosyanın yanındaki varsayılan cache klasörünü döndürür.
+def _default_cache_dir(path, cache_dir=None):
+    if cache_dir is None:
+        return os.path.join(os.path.dirname(os.path.abspath(path)), DEFAULT_CACHE_DIR_NAME)
+    return cache_dir
+
+
+# Bu fonksiyon, cache dosyası varsa onu memory-map ile açar, yoksa build_func ile dataframe'i oluşturup cache'e yazar.
+def _read_through_cache(path, tag, build_func, cache_dir=None, refresh=False):
+    if feather is None:
+        return build_func()
+
+    cache_dir = _default_cache_dir(path, cache_dir)
+    cache_file, prefix = _cache_path(path, tag, cache_dir)
+
+    if os.path.exists(cache_file) and not refresh:
+        return feather.read_table(cache_file, memory_map=True).to_pandas()
+
+    dataframe = build_func()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Aynı kaynak dosya + etikete ait eski cache dosyalarını sil
+    for file_name in os.listdir(cache_dir):
+        if file_name.startswith(prefix) and os.path.join(cache_dir, file_name) != cache_file:
+            os.remove(os.path.join(cache_dir, file_name))
+
+    # Önce geçici dosyaya yazıp sonra rename ediyoruz: yarım kalan bir yazma işlemi bozuk cache bırakmasın
+    tmp_file = cache_file + ".tmp"
+    feather.write_feather(dataframe, tmp_file, compression="uncompressed")
+    os.replace(tmp_file, cache_file)
+
+    return dataframe
+
+
+# Bu fonksiyon, okunan sheet'in sütun tiplerini sabitler. (Arrow karışık tipli object sütunları yazamaz)
+def _apply_retail_dtypes(dataframe):
+    for col, dtype in RETAIL_DTYPES.items():
+        if col in dataframe.columns:
+            dataframe[col] = dataframe[col].astype(dtype)
+    if "Description" in dataframe.columns:
+        # NaN değerler korunmalı, yoksa "nan" stringine dönüşür ve dropna() onları silemez
+        desc = dataframe["Description"]
+        dataframe["Description"] = desc.where(desc.isna(), desc.astype(str))
+    if "InvoiceDate" in dataframe.columns:
+        dataframe["InvoiceDate"] = pd.to_datetime(dataframe["InvoiceDate"])
+    return dataframe
+
+
+def load_online_retail(path, sheet_name="Year 2010-2011", cache_dir=None, refresh=False):
+    """
+    Reads one sheet of the Online Retail II workbook through an Arrow cache.
+
+    The first call parses the sheet with pd.read_excel, fixes the column dtypes and writes
+    an uncompressed Feather (Arrow IPC) file. Later calls memory-map that file instead of
+    parsing the workbook again. The cache file name contains the workbook's size and mtime,
+    so an updated workbook is parsed again and the stale cache file is removed.
+
+    Parameters:
+    ----------
+    path: str
+        Path of online_retail_II.xlsx.
+    sheet_name: str
+        Sheet to read: "Year 2009-2010" or "Year 2010-2011".
+    cache_dir: str, optional
+        Folder of the cache files. Defaults to a ".miuul_cache" folder next to the workbook.
+    refresh: bool
+        If True, the sheet is parsed again and the cache file is overwritten.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        Invoice and StockCode are str, Country is category, the other columns keep their numeric types.
+
+    Example Usage:
+    --------------
+    df_ = load_online_retail("datasets/online_retail_II.xlsx", sheet_name="Year 2010-2011")
+    """
+    return _read_through_cache(path, sheet_name,
+                               lambda: _apply_retail_dtypes(pd.read_excel(path, sheet_name=sheet_name)),
+                               cache_dir=cache_dir, refresh=refresh)
+
+
+def load_online_retail_all(path, sheet_names=RETAIL_SHEETS, max_workers=None, cache_dir=None, refresh=False):
+    """
+    Reads all sheets of the Online Retail II workbook concurrently and returns one frame.
+
+    Sheets without a valid cache file are parsed in parallel worker processes (one sheet per
+    process), cached sheets are memory-mapped in the current process. The sheets are concatenated
+    in date order with the dtypes of load_online_retail(). Invoices found in an earlier sheet
+    (1-9 December 2010 is in both sheets) are dropped from the later sheet.
+
+    Parameters:
+    ----------
+    path: str
+        Path of online_retail_II.xlsx.
+    sheet_names: tuple
+        Sheets to read.
+    max_workers: int, optional
+        Number of worker processes. Defaults to the number of sheets to be parsed.
+    cache_dir: str, optional
+        Folder of the cache files. Defaults to a ".miuul_cache" folder next to the workbook.
+    refresh: bool
+        If True, every sheet is parsed again and its cache file is overwritten.
+
+    Returns:
+    -------
+    pandas.DataFrame
+
+    Example Usage:
+    --------------
+    df_ = load_online_retail_all("datasets/online_retail_II.xlsx")
+    """
+    frames = {}
+    to_parse = []
+    for sheet_name in sheet_names:
+        cache_file, _ = _cache_path(path, sheet_name, _default_cache_dir(path, cache_dir))
+        if feather is not None and os.path.exists(cache_file) and not refresh:
+            frames[sheet_name] = load_online_retail(path, sheet_name, cache_dir=cache_dir)
+        else:
+            to_parse.append(sheet_name)
+
+    if len(to_parse) == 1:
+        frames[to_parse[0]] = load_online_retail(path, to_parse[0], cache_dir=cache_dir, refresh=refresh)
+    elif to_parse:
+        with ProcessPoolExecutor(max_workers=max_workers or len(to_parse)) as executor:
+            futures = {sheet_name: executor.submit(load_online_retail, path, sheet_name, cache_dir, refresh)
+                       for sheet_name in to_parse}
+            for sheet_name, future in futures.items():
+                frames[sheet_name] = future.result()
+
+    # Sheet'leri tarih sırasına koyalım, önceki sheet'lerde görülen faturaları sonraki sheet'ten çıkaralım
+    ordered = sorted(frames.values(), key=lambda frame: frame["InvoiceDate"].min())
+    kept = [ordered[0]]
+    for frame in ordered[1:]:
+        start = frame["InvoiceDate"].min()
+        seen = pd.concat([prev.loc[prev["InvoiceDate"] >= start, "Invoice"] for prev in kept]).unique()
+        kept.append(frame.loc[~frame["Invoice"].isin(seen)])
+
+    dataframe = pd.concat(kept, ignore_index=True)
+    # Sheet'lerin Country kategorileri farklı olduğunda concat object'e çevirir, tekrar category yapalım
+    dataframe["Country"] = dataframe["Country"].astype("category")
+    return dataframe
+
+
+##################################################################################
+# MovieLens (rating.csv ~20M satır, movie.csv ~27K satır)
+##################################################################################
+
+# rating.csv varsayılan tiplerle okunduğunda id'ler int64, rating float64, timestamp ise object (string) gelir: birkaç GB.
+# Kullanılmayan sütunlar hiç okunmaz, kalanlar küçük tiplerle ve parça parça (chunk) okunur.
+RATING_DTYPES = {"userId": "int32", "movieId": "int32", "rating": "float32"}
+
+
+def load_movielens_ratings(path, usecols=("userId", "movieId", "rating"), chunksize=2_000_000,
+                           cache_dir=None, refresh=False):
+    """
+    Reads MovieLens rating.csv with compact dtypes, chunk by chunk, through an Arrow cache.
+
+    userId/movieId are read as int32, rating as float32 and timestamp (only if requested)
+    as datetime64. Only the typed chunks are kept in memory, and the result is written to
+    an uncompressed Feather file so later runs only memory-map it.
+
+    Parameters:
+    ----------
+    path: str
+        Path of rating.csv.
+    usecols: tuple
+        Columns to read. Add "timestamp" if it is needed.
+    chunksize: int
+        Number of rows parsed per chunk.
+    cache_dir: str, optional
+        Folder of the cache files. Defaults to a ".miuul_cache" folder next to the csv.
+    refresh: bool
+        If True, the csv is parsed again and the cache file is overwritten.
+
+    Returns:
+    -------
+    pandas.DataFrame
+
+    Example Usage:
+    --------------
+    rating = load_movielens_ratings("datasets/movie_lens_dataset/rating.csv")
+    """
+    usecols = list(usecols)
+
+    def build():
+        dtypes = {col: dtype for col, dtype in RATING_DTYPES.items() if col in usecols}
+        chunks = []
+        for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+            if "timestamp" in usecols:
+                chunk["timestamp"] = pd.to_datetime(chunk["timestamp"])
+            chunks.append(chunk)
+        return pd.concat(chunks, ignore_index=True)[usecols]
+
+    return _read_through_cache(path, "_".join(usecols), build, cache_dir=cache_dir, refresh=refresh)
+
+
+def load_movielens_movies(path, usecols=("movieId", "title"), cache_dir=None, refresh=False):
+    """
+    Reads MovieLens movie.csv with movieId as int32, title and genres as str.
+
+    Title is kept as str on purpose: as a category it would make every
+    pivot_table(columns="title") built on the merged ratings include all
+    categories unless observed=True is passed. The merge key movieId is int32,
+    the same dtype as in load_movielens_ratings(), so the merge does not upcast.
+
+    Parameters:
+    ----------
+    path: str
+        Path of movie.csv.
+    usecols: tuple
+        Columns to read. Add "genres" if it is needed.
+
+    Returns:
+    -------
+    pandas.DataFrame
+
+    Example Usage:
+    --------------
+    movie = load_movielens_movies("datasets/movie_lens_dataset/movie.csv")
+    """
+    usecols = list(usecols)
+
+    def build():
+        dtypes = {"movieId": "int32"} if "movieId" in usecols else {}
+        return pd.read_csv(path, usecols=usecols, dtype=dtypes)[usecols]
+
+    return _read_through_cache(path, "_".join(usecols), build, cache_dir=cache_dir, refresh=refresh)
+
+
+##################################################################################
+# Out-of-core okuma : belleğe sığmayan işlem dosyalarını chunk chunk okuma
+##################################################################################
+
+# Bu fonksiyon, Online Retail II formatındaki Parquet / CSV dosyalarını tiplendirilmiş chunk'lar halinde döndürür.
+# Aynı anda bellekte sadece 1 chunk bulunur. (Excel dosyaları chunk chunk okunamaz, önce Parquet / CSV'ye çevrilmeli)
+def iter_online_retail_chunks(paths, columns=None, chunksize=1_000_000):
+    """
+    Yields typed Online Retail II chunks from one or more Parquet / CSV files.
+
+    Parameters:
+    ----------
+    paths: str or list of str
+        .parquet or .csv files, read in the given order.
+    columns: list, optional
+        Columns to read. Defaults to all columns.
+    chunksize: int
+        Number of rows per chunk.
+
+    Returns:
+    -------
+    generator of pandas.DataFrame
+
+    Example Usage:
+    --------------
+    for chunk in iter_online_retail_chunks(["retail_2009.parquet", "retail_2010.parquet"]):
+        ...
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        extension = os.path.splitext(str(path))[1].lower()
+        if extension == ".parquet":
+            if pq is None:
+                raise ImportError("Reading parquet files requires pyarrow: pip install pyarrow")
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+                yield _apply_retail_dtypes(batch.to_pandas())
+        elif extension == ".csv":
+            dtypes = {col: dtype for col, dtype in RETAIL_DTYPES.items() if columns is None or col in columns}
+            for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize):
+                yield _apply_retail_dtypes(chunk)
+        else:
+            raise ValueError(f"Only .parquet and .csv files can be read in chunks, got {path!r}")
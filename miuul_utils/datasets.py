@@ -0,0 +1,111 @@
+##################################################################################
+# DATASET REGISTRY : Veri setlerine isimle erişim (hard-coded path yerine)
+##################################################################################
+
+# Scriptlerde "/Users/.../datasets/online_retail_II.xlsx" gibi mutlak path'ler vardı, fonksiyonlar da (örn. user_based_recommender)
+# her çağrıldığında aynı dosyaları baştan okuyordu.
+
+# Bu modülde:
+# - Veri setleri bir isimle kaydedilir, path'ler tek bir kök dizine (data root) göre çözülür.
+# - Her veri seti process başına yalnızca 1 kez, ilk istendiğinde (lazy) okunur ve bellekte tutulur.
+# - Sonraki çağrılar aynı dataframe'i döndürür, dosya tekrar okunmaz.
+
+# Data root sırası: set_data_root(...) > MIUUL_DATA_ROOT ortam değişkeni > <repo kök dizini>/datasets
+
+import os
+import threading
+
+import pandas as pd
+
+from miuul_utils.data_loader import (load_online_retail, load_online_retail_all, load_movielens_movies,
+                                    load_movielens_ratings)
+
+
+DATA_ROOT_ENV = "MIUUL_DATA_ROOT"
+
+# isim : (data root'a göre göreli path, okuma fonksiyonu, okuma fonksiyonuna gidecek ek parametreler)
+DATASETS = {
+    "online_retail": ("online_retail_II.xlsx", load_online_retail_all, {}),        # iki sheet birlikte
+    "online_retail_2009_2010": ("online_retail_II.xlsx", load_online_retail, {"sheet_name": "Year 2009-2010"}),
+    "online_retail_2010_2011": ("online_retail_II.xlsx", load_online_retail, {"sheet_name": "Year 2010-2011"}),
+    "movielens_movie": ("movie_lens_dataset/movie.csv", load_movielens_movies, {}),
+    "movielens_rating": ("movie_lens_dataset/rating.csv", load_movielens_ratings, {}),
+    "movielens_rating_timestamp": ("movie_lens_dataset/rating.csv", load_movielens_ratings,
+                                   {"usecols": ("userId", "movieId", "rating", "timestamp")}),
+    "flo_data_20k": ("flo_data_20k.csv", pd.read_csv, {}),
+}
+
+_data_root = None
+_loaded = {}
+_lock = threading.Lock()
+
+
+# Bu fonksiyon, veri setlerinin aranacağı kök dizini değiştirir. (Önceden okunmuş veri setleri bellekten silinir)
+def set_data_root(path):
+    global _data_root
+    with _lock:
+        _data_root = os.path.abspath(path)
+        _loaded.clear()
+
+
+# Bu fonksiyon, geçerli kök dizini döndürür.
+def get_data_root():
+    if _data_root is not None:
+        return _data_root
+    if os.environ.get(DATA_ROOT_ENV):
+        return os.path.abspath(os.environ[DATA_ROOT_ENV])
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets")
+
+
+# Bu fonksiyon, registry'e yeni bir veri seti ekler.
+def register_dataset(name, relative_path, loader=pd.read_csv, **loader_kwargs):
+    with _lock:
+        DATASETS[name] = (relative_path, loader, loader_kwargs)
+        _loaded.pop(name, None)
+
+
+# Bu fonksiyon, kayıtlı bir veri setinin tam path'ini döndürür.
+def dataset_path(name):
+    if name not in DATASETS:
+        raise KeyError(f"Unknown dataset '{name}'. Registered datasets: {sorted(DATASETS)}")
+    return os.path.join(get_data_root(), DATASETS[name][0])
+
+
+def get_dataset(name, copy=False):
+    """
+    Returns a registered dataset, reading it from disk only on the first call in the process.
+
+    Parameters:
+    ----------
+    name: str
+        Registered dataset name, e.g. "online_retail_2010_2011", "movielens_rating".
+    copy: bool
+        If False, a shallow copy of the cached frame is returned: adding or dropping columns does not
+        affect other callers, but in-place value writes (e.g. df.loc[...] = x) would, unless pandas
+        Copy-on-Write is enabled. If True, a deep copy is returned.
+
+    Returns:
+    -------
+    pandas.DataFrame
+
+    Example Usage:
+    --------------
+    df_ = get_dataset("online_retail_2010_2011")
+    df = df_.copy()
+    """
+    with _lock:
+        if name not in _loaded:
+            path = dataset_path(name)
+            _, loader, loader_kwargs = DATASETS[name]
+            _loaded[name] = loader(path, **loader_kwargs)
+        dataframe = _loaded[name]
+    return dataframe.copy(deep=copy)
+
+
+# Bu fonksiyon, bellekte tutulan veri setlerini siler. (name verilmezse hepsi silinir)
+def clear_datasets(name=None):
+    with _lock:
+        if name is None:
+            _loaded.clear()
+        else:
+            _loaded.pop(name, None)
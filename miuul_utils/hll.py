@@ -0,0 +1,260 @@
+##################################################################################
+# HYPERLOGLOG : Müşteri bazında yaklaşık eşsiz fatura sayısı (frequency)
+##################################################################################
+
+# RFM / CLTV'deki frequency metriği, müşteri başına Invoice.nunique(). Exact hesap her müşterinin tüm fatura id'lerini
+# (hash set olarak) bellekte tutar; geçmişi çok uzun toptancı hesaplarında RFM job'unun memory peak'i burası.
+
+# GroupedHyperLogLog her müşteri için bir HyperLogLog sketch'i tutar:
+# - Fatura id'si 64-bit hash'lenir. İlk p bit register numarası, kalan bitlerdeki baştaki sıfır sayısı + 1 register değeridir (rho).
+# - Az faturalı müşteriler sparse tutulur: her dolu (müşteri, register) çifti tek bir int64 kodudur (grup | register | rho).
+#   Bir müşterinin sparse kodları 2^p byte'lık dense register dizisinden fazla yer tutmaya başlayınca (2^p / 8 kod) müşteri
+#   dense'e geçer: 2^p uint8 register. Fatura sayısı ne kadar büyürse büyüsün müşteri başına bellek ~2^p byte ile sınırlıdır.
+# - Yeni sparse kodlar chunk chunk biriktirilir, birikenler mevcut sparse kodlar kadar olunca tek seferde birleştirilir.
+# - İki sketch, register bazında max alınarak birleştirilir: chunk'lar ve process'ler arasında birleştirilebilir (mergeable).
+# - Standart hata ≈ 1.04 / sqrt(2^p). Küçük sayılarda (2.5 * 2^p altı) linear counting kullanılır, sonuç neredeyse exact'tir.
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_HLL_PRECISION = 10    # 1024 register, standart hata ~%3.3
+RHO_BITS = 6                  # sparse kodun en alt 6 biti rho (en fazla 33)
+RHO_MASK = (1 << RHO_BITS) - 1
+
+
+# Bu fonksiyon, 64-bit hash'lerden register numarasını ve register değerini (baştaki sıfır sayısı + 1) hesaplar.
+def _registers(hashes, precision):
+    hashes = np.asarray(hashes, dtype="uint64")
+    registers = (hashes >> np.uint64(64 - precision)).astype("uint16")
+    remaining = hashes << np.uint64(precision)
+    # Üst 32 bit float64'e kayıpsız çevrilir; bit uzunluğu frexp'in üssüdür. (üst 32 bit sıfırsa ihtimal 2^-32, 33 kabul edilir)
+    top = (remaining >> np.uint64(32)).astype("float64")
+    rho = np.where(top > 0, 33 - np.frexp(top)[1], 33).astype("uint8")
+    return registers, rho
+
+
+# Bu fonksiyon, sparse kodları sıralar ve her (grup, register) için en büyük rho'lu kodu tutar.
+def _max_per_register(codes):
+    codes = np.unique(codes)
+    keys = codes >> RHO_BITS
+    last = np.ones(len(codes), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    return codes[last]
+
+
+class GroupedHyperLogLog:
+    """
+    Mergeable HyperLogLog distinct counters, one per group (e.g. distinct invoices per customer).
+
+    Small groups are kept sparse (one int64 code per filled register). A group switches to a
+    dense uint8 array of 2^p registers once its sparse codes would take more space, so the
+    memory of a group is bounded by about 2^p bytes however many items it has.
+
+    Parameters:
+    ----------
+    precision: int
+        Number of index bits p (4-16). Each group uses at most 2^p registers,
+        the relative standard error is about 1.04 / sqrt(2^p).
+
+    Example Usage:
+    --------------
+    hll = GroupedHyperLogLog(precision=10)
+    for chunk in chunks:
+        hll.update(chunk["Customer ID"], chunk["Invoice"])
+    frequency = hll.estimate()      # müşteri bazında yaklaşık Invoice.nunique()
+    """
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision must be between 4 and 16, got {precision}")
+        self.precision = precision
+        self.sparse_limit = 2 ** precision // 8                 # bu kadar sparse kod (8 byte) dense satır (2^p byte) kadar yer tutar
+        self.groups = None                                      # grup etiketleri, sıra numarası grup kodudur
+        self.dense_rows = np.empty(0, dtype="int64")            # grup kodu -> dense satır numarası (-1: sparse)
+        self.dense = np.zeros((0, 2 ** precision), dtype="uint8")
+        self.n_dense = 0
+        self.sparse = np.empty(0, dtype="int64")                # sıralı (grup, register, rho) kodları
+        self._pending = []                                      # henüz birleştirilmemiş sparse kodlar
+        self._pending_size = 0
+
+    # Bu fonksiyon, grup etiketlerini grup kodlarına çevirir, ilk kez görülen grupları (sparse olarak) ekler.
+    def _group_codes(self, labels):
+        codes, uniques = pd.factorize(labels)
+        if self.groups is None:
+            self.groups = pd.Index(uniques[:0])
+        ids = self.groups.get_indexer(uniques)
+        new = ids == -1
+        if new.any():
+            ids[new] = np.arange(len(self.groups), len(self.groups) + new.sum())
+            self.groups = self.groups.append(pd.Index(uniques[new]))
+            self.dense_rows = np.concatenate([self.dense_rows, np.full(new.sum(), -1, dtype="int64")])
+        return ids[codes]
+
+    def _encode(self, ids, registers, rho):
+        return ((ids.astype("int64") << self.precision | registers.astype("int64")) << RHO_BITS) | rho.astype("int64")
+
+    # Bu fonksiyon, verilen gruplara dense register satırı ayırır. (kapasite gerektiğinde 2 katına çıkar)
+    def _promote(self, ids):
+        needed = self.n_dense + len(ids)
+        if needed > len(self.dense):
+            dense = np.zeros((max(needed, 2 * len(self.dense)), 2 ** self.precision), dtype="uint8")
+            dense[:self.n_dense] = self.dense[:self.n_dense]
+            self.dense = dense
+        self.dense_rows[ids] = np.arange(self.n_dense, needed)
+        self.n_dense = needed
+
+    # Bu fonksiyon, birikmiş sparse kodları mevcut olanlarla birleştirir, eşiği aşan grupları dense'e taşır.
+    def _reduce(self):
+        codes = _max_per_register(np.concatenate([self.sparse, *self._pending]))
+        self._pending, self._pending_size = [], 0
+        if self.groups is None:
+            return self
+        ids = codes >> (RHO_BITS + self.precision)
+        counts = np.bincount(ids, minlength=len(self.groups))
+        self._promote(np.flatnonzero((counts >= self.sparse_limit) & (self.dense_rows < 0)))
+        to_dense = self.dense_rows[ids] >= 0
+        if to_dense.any():
+            moved = codes[to_dense]
+            np.maximum.at(self.dense, (self.dense_rows[moved >> (RHO_BITS + self.precision)],
+                                       (moved >> RHO_BITS) & (2 ** self.precision - 1)),
+                          (moved & RHO_MASK).astype("uint8"))
+        self.sparse = codes[~to_dense]
+        return self
+
+    def _add_sparse(self, codes):
+        self._pending.append(codes)
+        self._pending_size += len(codes)
+        if self._pending_size >= len(self.sparse):
+            self._reduce()
+        return self
+
+    def update(self, groups, items):
+        """
+        Adds (group, item) pairs, e.g. customer ids and invoice ids. Rows with a missing group or item are skipped.
+
+        Returns:
+        -------
+        GroupedHyperLogLog
+        """
+        groups, items = np.asarray(groups), np.asarray(items)
+        valid = pd.notna(groups) & pd.notna(items)
+        # Her eşsiz item bir kez str'ye çevrilip hash'lenir (int ve str fatura id'leri aynı hash'i alır)
+        item_codes, item_values = pd.factorize(items[valid])
+        hashes = pd.util.hash_array(pd.Series(item_values).astype(str).to_numpy(dtype=object))[item_codes]
+        registers, rho = _registers(hashes, self.precision)
+        ids = self._group_codes(groups[valid])
+
+        dense = self.dense_rows[ids] >= 0
+        if dense.any():
+            np.maximum.at(self.dense, (self.dense_rows[ids[dense]], registers[dense]), rho[dense])
+        sparse = ~dense
+        return self._add_sparse(_max_per_register(self._encode(ids[sparse], registers[sparse], rho[sparse])))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge sketches with precision {self.precision} and {other.precision}")
+        other._reduce()
+        if other.groups is None:
+            return self
+        ids = self._group_codes(other.groups.to_numpy())        # other'ın grup kodu -> bu sketch'teki grup kodu
+
+        dense_ids = np.flatnonzero(other.dense_rows >= 0)
+        if len(dense_ids):
+            own_ids = ids[dense_ids]
+            self._promote(own_ids[self.dense_rows[own_ids] < 0])
+            rows = self.dense_rows[own_ids]
+            self.dense[rows] = np.maximum(self.dense[rows], other.dense[other.dense_rows[dense_ids]])
+
+        shift = RHO_BITS + self.precision
+        codes = (ids[other.sparse >> shift] << shift) | (other.sparse & ((1 << shift) - 1))
+        self._pending.append(codes)
+        return self._reduce()
+
+    # Bu fonksiyon, sketch'in bellekte kapladığı byte sayısını döndürür. (sparse kodlar, dense register'lar, grup etiketleri)
+    def nbytes(self):
+        self._reduce()
+        groups = 0 if self.groups is None else self.groups.memory_usage(deep=True)
+        return int(self.sparse.nbytes + self.dense.nbytes + self.dense_rows.nbytes + groups)
+
+    def estimate(self):
+        """
+        Estimated number of distinct items per group.
+
+        Returns:
+        -------
+        pandas.Series
+            Estimated counts (int64) indexed by group, sorted by group.
+        """
+        self._reduce()
+        if self.groups is None:
+            return pd.Series(dtype="int64", name="frequency")
+        m = 2 ** self.precision
+        n_groups = len(self.groups)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        powers = np.exp2(-np.arange(RHO_MASK + 1, dtype="float64"))     # 2^-rho tablosu
+
+        # Boş register'ların değeri 0'dır, 2^-0 = 1 katkı yapar
+        ids = self.sparse >> (RHO_BITS + self.precision)
+        filled = np.bincount(ids, minlength=n_groups).astype("float64")
+        harmonic = np.bincount(ids, weights=powers[self.sparse & RHO_MASK], minlength=n_groups) + (m - filled)
+        dense_ids = np.flatnonzero(self.dense_rows >= 0)
+        for start in range(0, len(dense_ids), 4096):
+            block = dense_ids[start:start + 4096]
+            rows = self.dense[self.dense_rows[block]]
+            filled[block] = np.count_nonzero(rows, axis=1)
+            harmonic[block] = powers[rows].sum(axis=1)
+
+        raw = alpha * m * m / harmonic
+        empty = m - filled
+        linear = m * np.log(m / np.maximum(empty, 1))
+        estimate = np.where((raw <= 2.5 * m) & (empty > 0), linear, raw)
+        return pd.Series(np.rint(estimate).astype("int64"), index=self.groups, name="frequency").sort_index()
+
+
+def hll_accuracy_report(dataframe, group_col="Customer ID", item_col="Invoice", precisions=(8, 10, 12, 14)):
+    """
+    Compares HyperLogLog distinct counts with exact nunique counts for several precisions.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Transactions, e.g. Online Retail II without cancelled invoices.
+    group_col: str
+        Group column (customer id).
+    item_col: str
+        Column whose distinct values are counted (invoice id).
+    precisions: tuple
+        HyperLogLog precisions to compare.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per precision: expected standard error, mean / 99th percentile / max relative error,
+        share of groups estimated exactly, relative error of the total, sketch size vs. exact (customer, invoice) pairs.
+
+    Example Usage:
+    --------------
+    hll_accuracy_report(df[~df["Invoice"].str.contains("C", na=False)])
+    """
+    dataframe = dataframe[[group_col, item_col]].dropna()
+    exact = dataframe.groupby(group_col)[item_col].nunique()
+    exact_pairs = dataframe.drop_duplicates()
+    exact_bytes = int(exact_pairs.memory_usage(index=False, deep=True).sum())
+
+    rows = []
+    for precision in precisions:
+        hll = GroupedHyperLogLog(precision).update(dataframe[group_col], dataframe[item_col])
+        estimate = hll.estimate().reindex(exact.index, fill_value=0)
+        relative_error = (estimate - exact).abs() / exact
+        rows.append({"precision": precision,
+                     "registers": 2 ** precision,
+                     "expected_std_error": 1.04 / np.sqrt(2 ** precision),
+                     "mean_rel_error": relative_error.mean(),
+                     "p99_rel_error": relative_error.quantile(0.99),
+                     "max_rel_error": relative_error.max(),
+                     "exact_share": (estimate == exact).mean(),
+                     "total_rel_error": estimate.sum() / exact.sum() - 1,
+                     "sketch_bytes": hll.nbytes(),
+                     "exact_bytes": exact_bytes})
+    return pd.DataFrame(rows).set_index("precision")
@@ -0,0 +1,274 @@
+##################################################################################
+# MODEL CACHE : BG-NBD ve Gamma-Gamma fit sonuçlarının diske yazılması
+##################################################################################
+
+# create_cltv_p ve create_clv_df her çağrıldığında BetaGeoFitter(penalizer_coef=0.001) ve GammaGammaFitter(penalizer_coef=0.01)
+# modellerini baştan kuruyor. Her fit bir SciPy optimizasyonu: 100K+ müşteride onlarca saniye.
+
+# CLTVModelCache:
+# - Girdi dizilerinin (frequency, recency, T / monetary) byte'larından ve penalizer'dan bir parmak izi (SHA-1) üretir.
+# - Fit edilen parametreleri bu parmak iziyle küçük bir JSON dosyasına yazar. Aynı girdi tekrar geldiğinde fit yapılmaz,
+#   parametreler dosyadan okunur (cache hit).
+# - Girdi biraz değişmişse (örn. aynı veri setinin yeni bir günü, müşteri sayısı %10'dan az değişmiş) önceki parametreler
+#   optimizasyonun başlangıç noktası olur (warm start): optimizer çözüme çok yakından başlar, daha az iterasyonla biter.
+#   Warm start sadece aynı dataset etiketiyle yapılmış fit'lerden olur; etiket verilmezse cache miss'te model sıfırdan kurulur.
+# - Kayıtların özeti (model, penalizer, dataset, müşteri sayısı, son kullanım) tek bir index.json dosyasında tutulur:
+#   warm start adayı aranırken tüm parametre dosyaları açılmaz. Kayıt sayısı max_entries'i aşınca en uzun süredir
+#   kullanılmayanlar silinir. Aynı klasörü kullanan process'ler index'i bir kilit dosyası (index.lock) ile sırayla günceller.
+
+# Not: Cache'ten okunan modellerde params_, data ve predict vardır; standart hatalar (summary) için model tekrar fit edilmelidir.
+
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# pip install lifetimes
+try:
+    import lifetimes
+    from lifetimes import BetaGeoFitter, GammaGammaFitter
+except ImportError:
+    lifetimes = BetaGeoFitter = GammaGammaFitter = None
+
+from miuul_utils.bgnbd import BGNBD_PARAMS, BGNBDFitter
+from miuul_utils.data_loader import DEFAULT_CACHE_DIR_NAME
+
+GAMMA_GAMMA_PARAMS = ["p", "q", "v"]
+
+# lifetimes, predict'i fit() içinde instance'a bağlar. Cache'ten okunan (fit edilmeyen) BG-NBD modelinde predict,
+# BGNBDFitter'daki gibi sınıf seviyesinde tanımlıdır (ggf.customer_lifetime_value bgf.predict'i çağırır).
+if BetaGeoFitter is not None:
+    class _CachedBetaGeoFitter(BetaGeoFitter):
+        predict = BetaGeoFitter.conditional_expected_number_of_purchases_up_to_time
+
+
+# Bu fonksiyon, dizilerin tipi, boyutu ve byte'ları ile ayarlardan bir parmak izi üretir.
+def fingerprint(arrays, **settings):
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(np.asarray(array, dtype="float64"))
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class CLTVModelCache:
+    """
+    Disk cache for fitted BG-NBD and Gamma-Gamma parameters, keyed by an input fingerprint, with warm start.
+
+    Parameters:
+    ----------
+    cache_dir: str, optional
+        Folder of the parameter files. Defaults to ".miuul_cache/models" in the working directory.
+    dataset: str, optional
+        Lineage tag of the data fitted through this cache, e.g. "flo_daily" or "online_retail_uk".
+        It is stored in every entry, and warm starts only use entries with the same tag.
+        None disables warm start.
+    warm_start_tolerance: float
+        On a cache miss, the newest cached fit of the same dataset, model and penalizer is used as the
+        starting point if its customer count (sum of weights, if given) differs by at most this share.
+        None disables warm start.
+    max_entries: int
+        Maximum number of cached fits. The least recently used entries are removed beyond it.
+
+    Example Usage:
+    --------------
+    cache = CLTVModelCache(dataset="online_retail_uk")
+    bgf = cache.fit_bgnbd(cltv_df["frequency"], cltv_df["recency"], cltv_df["T"], penalizer_coef=0.001)
+    ggf = cache.fit_gamma_gamma(cltv_df["frequency"], cltv_df["monetary"], penalizer_coef=0.01)
+    cache.stats          # {'hits': 0, 'misses': 2, 'warm_starts': 0}
+    """
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "index.lock"
+    LOCK_TIMEOUT = 30     # saniye: bundan eski bir kilit dosyası, çöken bir process'ten kalmış sayılır
+    MODELS = ("bgnbd", "gamma_gamma")
+
+    def __init__(self, cache_dir=None, dataset=None, warm_start_tolerance=0.1, max_entries=100):
+        if lifetimes is None:
+            raise ImportError("CLTVModelCache requires lifetimes: pip install lifetimes")
+        self.cache_dir = cache_dir or os.path.join(DEFAULT_CACHE_DIR_NAME, "models")
+        self.dataset = dataset
+        self.warm_start_tolerance = warm_start_tolerance
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "warm_starts": 0}
+
+    def _file_name(self, model, key):
+        return f"{model}__{key}.json"
+
+    # Bu fonksiyon, JSON'u önce geçici bir dosyaya yazar, sonra atomik olarak yerine taşır.
+    def _write_json(self, file_name, content):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, file_name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(content, file)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, file_name):
+        path = os.path.join(self.cache_dir, file_name)
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            return json.load(file)
+
+    # Bu fonksiyon, index.json'u okuyup yazan adımları kilit dosyasıyla sıraya sokar: aynı anda çalışan process'ler
+    # birbirinin kaydını ezmez, index'te olmayan (clear'ın göremeyeceği) parametre dosyası kalmaz.
+    # Kilit dosyası O_EXCL ile atomik olarak oluşturulur, her işletim sisteminde çalışır.
+    @contextlib.contextmanager
+    def _index_lock(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, self.LOCK_FILE)
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                with contextlib.suppress(FileNotFoundError):
+                    if time.time() - os.path.getmtime(path) > self.LOCK_TIMEOUT:
+                        os.remove(path)
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.remove(path)
+
+    # Bu fonksiyon, index'i okur: {dosya adı: {model, penalizer_coef, dataset, n_customers, created, last_used}}
+    def _read_index(self):
+        return self._read_json(self.INDEX_FILE) or {}
+
+    # Bu fonksiyon, fit sonucunu yazar, index'e ekler ve kayıt sayısı max_entries'i aşarsa en eski kullanılanları siler.
+    def _save(self, model, key, entry):
+        file_name = self._file_name(model, key)
+        with self._index_lock():
+            self._write_json(file_name, entry)
+            index = self._read_index()
+            index[file_name] = {"model": model, "penalizer_coef": entry["penalizer_coef"], "dataset": entry["dataset"],
+                                "n_customers": entry["n_customers"], "created": entry["created"],
+                                "last_used": entry["created"]}
+            for stale in sorted(index, key=lambda name: index[name]["last_used"])[:max(len(index) - self.max_entries, 0)]:
+                if os.path.exists(os.path.join(self.cache_dir, stale)):
+                    os.remove(os.path.join(self.cache_dir, stale))
+                del index[stale]
+            self._write_json(self.INDEX_FILE, index)
+
+    # Bu fonksiyon, cache hit'te parametre dosyasını okur ve index'teki son kullanım zamanını günceller.
+    def _load(self, model, key):
+        file_name = self._file_name(model, key)
+        entry = self._read_json(file_name)
+        if entry is not None:
+            with self._index_lock():
+                index = self._read_index()
+                if file_name in index:
+                    index[file_name]["last_used"] = time.time()
+                    self._write_json(self.INDEX_FILE, index)
+        return entry
+
+    # Bu fonksiyon, warm start için aynı dataset, model ve penalizer'la yapılmış, müşteri sayısı yakın en yeni fit'i bulur.
+    def _warm_start_entry(self, model, penalizer_coef, n_customers):
+        if self.warm_start_tolerance is None or self.dataset is None:
+            return None
+        candidates = [(info["created"], file_name) for file_name, info in self._read_index().items()
+                      if info["model"] == model and info["dataset"] == self.dataset
+                      and info["penalizer_coef"] == penalizer_coef
+                      and abs(info["n_customers"] - n_customers) <= self.warm_start_tolerance * info["n_customers"]]
+        return self._read_json(max(candidates)[1]) if candidates else None
+
+    def _entry(self, fitter, params, penalizer_coef, n_customers):
+        return {"params": {name: float(fitter.params_[name]) for name in params},
+                "penalizer_coef": penalizer_coef,
+                "dataset": self.dataset,
+                "n_customers": n_customers,
+                "negative_log_likelihood": float(fitter._negative_log_likelihood_),
+                "lifetimes_version": lifetimes.__version__,
+                "created": time.time()}
+
+    def fit_bgnbd(self, frequency, recency, T, penalizer_coef=0.001, weights=None, engine="lifetimes"):
+        """
+        BetaGeoFitter(penalizer_coef).fit(frequency, recency, T), skipped on a cache hit.
+        engine="numpy" fits miuul_utils.bgnbd.BGNBDFitter instead (same parameters, separate cache entries).
+
+        Returns:
+        -------
+        lifetimes.BetaGeoFitter or BGNBDFitter
+        """
+        if engine not in ("lifetimes", "numpy"):
+            raise ValueError(f"engine must be 'lifetimes' or 'numpy', got {engine!r}")
+        frequency, recency, T = (np.asarray(values, dtype="float64") for values in (frequency, recency, T))
+        # compress=True ile her satır bir (frequency, recency, T) üçlüsü, müşteri sayısı ağırlıkların toplamıdır
+        n_customers = len(T) if weights is None else int(np.sum(weights))
+        arrays = [frequency, recency, T] if weights is None else [frequency, recency, T, weights]
+        key = fingerprint(arrays, model="bgnbd", penalizer_coef=penalizer_coef, version=lifetimes.__version__,
+                          engine=engine)
+        entry = self._load("bgnbd", key)
+
+        if entry is not None:
+            self.stats["hits"] += 1
+            bgf = _CachedBetaGeoFitter(penalizer_coef=penalizer_coef) if engine == "lifetimes" else BGNBDFitter(penalizer_coef)
+            bgf.params_ = pd.Series(entry["params"])[BGNBD_PARAMS]
+            bgf._negative_log_likelihood_ = entry["negative_log_likelihood"]
+            bgf._scale = 1.0 / T.max()      # lifetimes'ın zaman ölçeklemesi (utils._scale_time)
+            if engine == "lifetimes":
+                bgf.data = pd.DataFrame({"frequency": frequency.astype(int), "recency": recency, "T": T,
+                                         "weights": np.ones(len(T), dtype=int) if weights is None else np.asarray(weights)})
+            return bgf
+
+        self.stats["misses"] += 1
+        bgf = BetaGeoFitter(penalizer_coef=penalizer_coef) if engine == "lifetimes" else BGNBDFitter(penalizer_coef)
+        initial_params = None
+        previous = self._warm_start_entry("bgnbd", penalizer_coef, n_customers)
+        if previous is not None:
+            self.stats["warm_starts"] += 1
+            # lifetimes log-uzayında ve alpha'yı 1 / max(T) ile ölçekleyerek optimize eder
+            params = previous["params"]
+            initial_params = np.log([params["r"], params["alpha"] / T.max(), params["a"], params["b"]])
+        bgf.fit(frequency, recency, T, weights=weights, initial_params=initial_params)
+        self._save("bgnbd", key, self._entry(bgf, BGNBD_PARAMS, penalizer_coef, n_customers))
+        return bgf
+
+    def fit_gamma_gamma(self, frequency, monetary, penalizer_coef=0.01, weights=None):
+        """
+        GammaGammaFitter(penalizer_coef).fit(frequency, monetary), skipped on a cache hit.
+
+        Returns:
+        -------
+        lifetimes.GammaGammaFitter
+        """
+        frequency, monetary = (np.asarray(values, dtype="float64") for values in (frequency, monetary))
+        n_customers = len(frequency) if weights is None else int(np.sum(weights))
+        arrays = [frequency, monetary] if weights is None else [frequency, monetary, weights]
+        key = fingerprint(arrays, model="gamma_gamma", penalizer_coef=penalizer_coef, version=lifetimes.__version__)
+        ggf = GammaGammaFitter(penalizer_coef=penalizer_coef)
+        entry = self._load("gamma_gamma", key)
+
+        if entry is not None:
+            self.stats["hits"] += 1
+            ggf.params_ = pd.Series(entry["params"])[GAMMA_GAMMA_PARAMS]
+            ggf._negative_log_likelihood_ = entry["negative_log_likelihood"]
+            ggf.data = pd.DataFrame({"monetary_value": monetary, "frequency": frequency,
+                                     "weights": np.ones(len(frequency), dtype=int) if weights is None else np.asarray(weights)})
+            return ggf
+
+        self.stats["misses"] += 1
+        initial_params = None
+        previous = self._warm_start_entry("gamma_gamma", penalizer_coef, n_customers)
+        if previous is not None:
+            self.stats["warm_starts"] += 1
+            initial_params = np.log([previous["params"][name] for name in GAMMA_GAMMA_PARAMS])
+        ggf.fit(frequency, monetary, weights=weights, initial_params=initial_params)
+        self._save("gamma_gamma", key, self._entry(ggf, GAMMA_GAMMA_PARAMS, penalizer_coef, n_customers))
+        return ggf
+
+    # Bu fonksiyon, klasördeki tüm parametre dosyalarını (index'te olmasalar da) ve index'i siler.
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        with self._index_lock():
+            for file_name in os.listdir(self.cache_dir):
+                if file_name == self.INDEX_FILE or file_name.startswith(tuple(f"{model}__" for model in self.MODELS)):
+                    os.remove(os.path.join(self.cache_dir, file_name))
@@ -0,0 +1,933 @@
+##################################################################################
+# RFM ENGINE : Recency, Frequency, Monetary metrikleri, skorları ve segmentleri
+##################################################################################
+
+# 3_CRM_analytics/RFM/rfm.py içindeki create_rfm metrikleri lambda'lı bir groupby ile hesaplıyor:
+# {'InvoiceDate': lambda date: ..., 'Invoice': lambda num: num.nunique(), 'TotalPrice': lambda price: price.sum()}
+# Bu durumda pandas her müşteri için Python fonksiyonu çağırır, milyonlarca satırda çok yavaştır.
+
+# Bu modülde iki hızlı yol var:
+# engine="pandas" : native max / nunique / sum named aggregation (Cython)
+# engine="numpy"  : müşteri id'leri factorize edilir, sıralı diziler üzerinde NumPy reduceat / bincount ile hesaplanır
+
+# benchmarks/rfm_engine_benchmark.py sonuçları (lambda'ya göre hızlanma):
+#    1M satır : pandas ~57x, numpy ~42x
+#   10M satır : pandas ~38x, numpy ~20x
+
+# frequency="hll" : eşsiz fatura sayısı exact nunique yerine müşteri bazlı HyperLogLog ile tahmin edilir (bkz. hll.py)
+
+import datetime as dt
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from miuul_utils.data_loader import iter_online_retail_chunks
+from miuul_utils.hll import DEFAULT_HLL_PRECISION, GroupedHyperLogLog
+
+
+ANALYSIS_DATE = dt.datetime(2011, 12, 11)
+CUSTOMER_COL = "Customer ID"
+OTHER_PARTITION = "Other"         # create_rfm_partitioned'da müşteri sayısı az olan partition'ların birleştiği grup
+ABSENT = "absent"                 # segment geçişlerinde, o snapshot'ta listede olmayan müşteri
+NO_DATE = np.iinfo("int64").min   # state'te henüz alışverişi olmayan müşterinin son tarihi (int64 olarak NaT)
+
+SEG_MAP = {
+    r'[1-2][1-2]': 'hibernating',
+    r'[1-2][3-4]': 'at_risk',
+    r'[1-2]5': 'cant_loose',
+    r'3[1-2]': 'about_to_sleep',
+    r'33': 'need_attention',
+    r'[3-4][4-5]': 'loyal_customers',
+    r'41': 'promising',
+    r'51': 'new_customers',
+    r'[4-5][2-3]': 'potential_loyalists',
+    r'5[4-5]': 'champions'
+}
+
+
+# Regex'li replace yerine: 5x5'lik tablo, [recency_score - 1, frequency_score - 1] hücresinde segment kodu tutar.
+# Tablo SEG_MAP'ten üretilir (pattern'ler birbiriyle çakışmaz), segment isimleri SEGMENTS listesindeki sırayla kodlanır.
+SEGMENTS = list(SEG_MAP.values())
+SEGMENT_TABLE = np.array([[next(code for code, pattern in enumerate(SEG_MAP) if re.fullmatch(pattern, f"{r}{f}"))
+                           for f in range(1, 6)] for r in range(1, 6)], dtype="int8")
+
+
+# Bu fonksiyon, sıralı bir dizide her grubun başladığı pozisyonları döndürür.
+def _group_starts(sorted_codes):
+    return np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+
+
+# Bu fonksiyon, factorize edilmiş müşteri kodları üzerinden RFM metriklerini NumPy ile hesaplar.
+def _rfm_metrics_numpy(dataframe, today_date, customer_col):
+    customer_codes, customers = pd.factorize(dataframe[customer_col], sort=True)
+    invoice_codes, invoices = pd.factorize(dataframe["Invoice"])
+    dates = dataframe["InvoiceDate"].to_numpy()
+    valid = customer_codes >= 0   # groupby gibi, müşteri id'si NaN olan satırları atla
+
+    # Müşteri, sonra fatura koduna göre sırala: her müşterinin satırları ve aynı faturaları yan yana gelir
+    # (iki anahtarı tek int64 anahtarda birleştirmek, lexsort'tan daha hızlıdır)
+    pair_key = customer_codes[valid].astype("int64") * (len(invoices) + 1) + invoice_codes[valid]
+    order = np.argsort(pair_key)
+    sorted_keys = pair_key[order]
+    sorted_customers = customer_codes[valid][order]
+    starts = _group_starts(sorted_customers)
+
+    # Recency: müşterinin son fatura tarihi
+    last_dates = np.maximum.reduceat(dates[valid][order].view("i8"), starts).view(dates.dtype)
+    recency = (np.datetime64(today_date).astype(dates.dtype) - last_dates) // np.timedelta64(1, "D")
+
+    # Frequency: müşteri + fatura çiftinin değiştiği her satır yeni bir eşsiz faturadır
+    new_invoice = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    frequency = np.bincount(sorted_customers[new_invoice], minlength=len(customers))
+
+    # Monetary: toplam harcama
+    monetary = np.add.reduceat(dataframe["TotalPrice"].to_numpy(dtype="float64")[valid][order], starts)
+
+    return pd.DataFrame({"recency": recency.astype("int64"), "frequency": frequency, "monetary": monetary},
+                        index=pd.Index(customers, name=customer_col))
+
+
+def rfm_metrics(dataframe, today_date=ANALYSIS_DATE, customer_col=CUSTOMER_COL, engine="pandas", frequency="exact",
+                hll_precision=DEFAULT_HLL_PRECISION):
+    """
+    Computes recency, frequency and monetary per customer without Python lambdas.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Cleaned transactions with InvoiceDate, Invoice and TotalPrice columns.
+    today_date: datetime
+        Analysis date that recency is measured against.
+    customer_col: str
+        Customer id column.
+    engine: str
+        "pandas" for native named aggregations, "numpy" for sorted reductions over factorized customer codes.
+        Both give the same frame (monetary may differ in the last floating point digits).
+    frequency: str
+        "exact" for Invoice.nunique(), "hll" for a HyperLogLog estimate that does not keep invoice id sets
+        (recency and monetary are then computed with the pandas engine).
+    hll_precision: int
+        HyperLogLog precision p, relative standard error about 1.04 / sqrt(2^p). Only used with frequency="hll".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        recency, frequency, monetary columns indexed by customer id (sorted).
+
+    Example Usage:
+    --------------
+    rfm = rfm_metrics(df, today_date=dt.datetime(2011, 12, 11))
+    """
+    if frequency == "hll":
+        rfm = dataframe.groupby(customer_col).agg(recency=("InvoiceDate", "max"), monetary=("TotalPrice", "sum"))
+        rfm["recency"] = (today_date - rfm["recency"]).dt.days
+        hll = GroupedHyperLogLog(hll_precision).update(dataframe[customer_col], dataframe["Invoice"])
+        rfm.insert(1, "frequency", hll.estimate().reindex(rfm.index, fill_value=0))
+        return rfm
+    if frequency != "exact":
+        raise ValueError(f"frequency must be 'exact' or 'hll', got {frequency!r}")
+    if engine == "numpy":
+        return _rfm_metrics_numpy(dataframe, today_date, customer_col)
+    if engine != "pandas":
+        raise ValueError(f"engine must be 'pandas' or 'numpy', got {engine!r}")
+
+    rfm = dataframe.groupby(customer_col).agg(recency=("InvoiceDate", "max"),
+                                              frequency=("Invoice", "nunique"),
+                                              monetary=("TotalPrice", "sum"))
+    rfm["recency"] = (today_date - rfm["recency"]).dt.days
+    return rfm
+
+
+# Bu fonksiyon, 1-5 arası skorları tek bir küçük integer kodda birleştirir: (5, 4) -> 54, (5, 4, 3) -> 543
+def rfm_code(*scores):
+    code = np.zeros(len(scores[0]), dtype="int16")
+    for score in scores:
+        code = code * 10 + np.asarray(score, dtype="int16")
+    return code.astype("int8") if len(scores) <= 2 else code
+
+
+def assign_segments(recency_score, frequency_score, segment_names=SEGMENTS):
+    """
+    Maps recency / frequency scores to segment names by indexing the 5x5 SEGMENT_TABLE.
+
+    Same result as building "RFM_SCORE" strings and running .replace(seg_map, regex=True),
+    without per-row string building or regex matching.
+
+    Parameters:
+    ----------
+    recency_score, frequency_score: array-like
+        Scores between 1 and 5 (int or categorical with integer labels).
+    segment_names: list
+        Names of the 10 segments in SEG_MAP order, e.g. to use 'at_Risk' instead of 'at_risk'.
+
+    Returns:
+    -------
+    pandas.Categorical
+
+    Example Usage:
+    --------------
+    rfm["segment"] = assign_segments(rfm["recency_score"], rfm["frequency_score"])
+    """
+    codes = SEGMENT_TABLE[np.asarray(recency_score, dtype="int8") - 1, np.asarray(frequency_score, dtype="int8") - 1]
+    return pd.Categorical.from_codes(codes, categories=segment_names)
+
+
+# Bu fonksiyon, RFM metriklerine 1-5 arası skorları ve segment isimlerini ekler. (rfm.py'deki qcut ve seg_map adımları)
+# Skorlar qcut(labels=False) ile doğrudan integer kod olarak alınır, RFM_SCORE da string yerine küçük bir integer'dır (örn. 54).
+def rfm_scores(rfm):
+    rfm["recency_score"] = (5 - pd.qcut(rfm['recency'], 5, labels=False)).astype("int8")
+    rfm["frequency_score"] = (pd.qcut(rfm["frequency"].rank(method="first"), 5, labels=False) + 1).astype("int8")
+    rfm["monetary_score"] = (pd.qcut(rfm['monetary'], 5, labels=False) + 1).astype("int8")
+    rfm["RFM_SCORE"] = rfm_code(rfm["recency_score"], rfm["frequency_score"])
+    rfm['segment'] = assign_segments(rfm["recency_score"], rfm["frequency_score"])
+    return rfm
+
+
+# Bu fonksiyon, create_rfm'deki gibi eksik değerli ve iptal edilen satırları atar, TotalPrice sütununu ekler.
+def _prepare_transactions(dataframe, customer_col=CUSTOMER_COL):
+    mask = dataframe.notna().all(axis=1) & ~dataframe["Invoice"].str.contains("C", na=False)
+    return dataframe.loc[mask, ["Invoice", "InvoiceDate", customer_col]].assign(
+        TotalPrice=dataframe.loc[mask, "Quantity"] * dataframe.loc[mask, "Price"])
+
+
+# Bu fonksiyon, recency / frequency / monetary metriklerinden create_rfm çıktısını oluşturur. (monetary > 0 filtresi, skorlar, segmentler)
+def _score_rfm(rfm):
+    rfm = rfm[(rfm['monetary'] > 0)].copy()
+    rfm = rfm_scores(rfm)
+    rfm = rfm[["recency", "frequency", "monetary", "segment"]]
+    rfm.index = rfm.index.astype(int)
+    return rfm
+
+
+# Bu fonksiyon, değerleri rank(method="first") sırasına göre 5 eşit gruba böler: ceil(rank * 5 / n).
+# Eşit değerler satır sırasıyla ayrılır; qcut'tan farklı olarak 5'ten az (tek) müşteride de çalışır.
+def _rank_quintiles(values):
+    rank = values.rank(method="first").to_numpy()
+    return np.ceil(rank * 5 / max(len(rank), 1)).astype("int8")
+
+
+# Bu fonksiyon, _score_rfm gibi skorlar. Eşit değerler yüzünden quintile sınırları çakışırsa (küçük partition'lar,
+# erken snapshot'lar) create_rfm hata verir; burada recency ve frequency rank üzerinden 5 eşit gruba bölünür
+# (_rank_quintiles). Bu müşteri gruplarının skorları create_rfm'den farklıdır (eşitlikler satır sırasıyla bozulur).
+def _score_rfm_safe(rfm):
+    rfm = rfm[(rfm['monetary'] > 0)]
+    try:
+        return _score_rfm(rfm)
+    except ValueError:
+        rfm = rfm[["recency", "frequency", "monetary"]].copy()
+        rfm["segment"] = assign_segments(6 - _rank_quintiles(rfm["recency"]), _rank_quintiles(rfm["frequency"]))
+        rfm.index = rfm.index.astype(int)
+        return rfm
+
+
+def create_rfm(dataframe, today_date=ANALYSIS_DATE, customer_col=CUSTOMER_COL, engine="pandas", csv=False,
+               frequency="exact", hll_precision=DEFAULT_HLL_PRECISION):
+    """
+    Same output as create_rfm in 3_CRM_analytics/RFM/rfm.py, computed with native / NumPy aggregations.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Raw Online Retail II transactions. The input frame is not modified.
+    today_date: datetime
+        Analysis date.
+    customer_col: str
+        Customer id column.
+    engine: str
+        "pandas" or "numpy", see rfm_metrics.
+    csv: bool
+        If True, the result is also written to rfm.csv.
+    frequency: str
+        "exact" or "hll" (approximate distinct invoice count), see rfm_metrics.
+    hll_precision: int
+        HyperLogLog precision, only used with frequency="hll".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        recency, frequency, monetary, segment columns indexed by integer customer id.
+
+    Example Usage:
+    --------------
+    rfm = create_rfm(df_)
+    rfm = create_rfm(df_, frequency="hll", hll_precision=12)
+    """
+    # VERIYI HAZIRLAMA (eksik değerler ve iptal faturaları tek maskede)
+    dataframe = _prepare_transactions(dataframe, customer_col)
+
+    # RFM METRIKLERI, SKORLARI, SEGMENTLERI
+    rfm = _score_rfm(rfm_metrics(dataframe, today_date, customer_col, engine, frequency, hll_precision))
+
+    if csv:
+        rfm.to_csv("rfm.csv")
+
+    return rfm
+
+
+
+
+
+##################################################################################
+# Incremental RFM : günlük delta'lardan güncellenen müşteri bazlı state
+##################################################################################
+
+# create_rfm her gece tüm işlem geçmişini baştan tarıyor, oysa sadece 1 günlük fatura değişiyor.
+# RFMStateStore her müşteri için sadece 3 değer tutar: son alışveriş tarihi, eşsiz fatura sayısı, toplam harcama.
+# Yeni gelen delta sadece kendi müşterilerinin satırlarını günceller (O(delta)), recency ise skorlama anında
+# yeni analiz tarihine göre hesaplanır: geçmiş işlemlere hiç dokunulmaz.
+
+# Varsayım: bir faturanın tüm satırları aynı delta içinde gelir (frequency, delta bazında nunique ile artırılır).
+
+class RFMStateStore:
+    """
+    Persistent per-customer RFM state, updated from daily transaction deltas.
+
+    Parameters:
+    ----------
+    customer_col: str
+        Customer id column of the deltas.
+    cancellations: str
+        "ignore": cancelled invoices (Invoice contains "C") are skipped, exactly like create_rfm.
+        "subtract": cancelled invoices are counted separately and their (negative) amounts are added to
+        monetary. At scoring time frequency is max(invoices - cancelled invoices, 0). Online Retail II
+        cancellations ("C489449") do not reference the invoice they cancel, so a partly cancelled invoice
+        still lowers frequency by 1. No create_rfm configuration produces this frequency.
+        Recency is not changed by cancellations.
+
+    Example Usage:
+    --------------
+    store = RFMStateStore()
+    store.apply_delta(df_)                      # tüm geçmiş, ilk kez
+    store.apply_delta(todays_invoices)          # her gece sadece yeni satırlar
+    rfm = store.to_rfm(today_date=dt.datetime(2011, 12, 12))
+    store.save("rfm_state.pkl")
+    """
+
+    def __init__(self, customer_col=CUSTOMER_COL, cancellations="ignore"):
+        if cancellations not in ("ignore", "subtract"):
+            raise ValueError(f"cancellations must be 'ignore' or 'subtract', got {cancellations!r}")
+        self.customer_col = customer_col
+        self.cancellations = cancellations
+        self.size = 0
+        self._row_of = {}
+        self._ids = np.empty(0, dtype=object)
+        self._last_date = np.empty(0, dtype="int64")     # datetime64[ns] değerleri, int64 olarak
+        self._frequency = np.empty(0, dtype="int64")
+        self._cancelled = np.empty(0, dtype="int64")     # cancellations="subtract" ile iptal faturası sayısı
+        self._monetary = np.empty(0, dtype="float64")
+
+    # Bu fonksiyon, dizilerin kapasitesini gerekirse 2 katına çıkarır. (her yeni müşteride kopyalama olmasın)
+    def _reserve(self, n):
+        capacity = len(self._frequency)
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity, 1024)
+        for name, fill in [("_ids", None), ("_last_date", NO_DATE), ("_frequency", 0), ("_cancelled", 0),
+                           ("_monetary", 0.0)]:
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    # Bu fonksiyon, müşteri id'lerinin satır numaralarını döndürür, yeni müşteriler için satır açar.
+    def _rows(self, customer_ids):
+        rows = np.fromiter((self._row_of.get(customer, -1) for customer in customer_ids),
+                           dtype="int64", count=len(customer_ids))
+        new = rows < 0
+        n_new = int(new.sum())
+        if n_new:
+            self._reserve(self.size + n_new)
+            rows[new] = np.arange(self.size, self.size + n_new)
+            self._row_of.update(zip(customer_ids[new], rows[new]))
+            self._ids[rows[new]] = customer_ids[new]
+            self.size += n_new
+        return rows
+
+    def apply_delta(self, dataframe):
+        """
+        Applies a batch of new (and optionally cancelled) transaction lines in O(len(batch)).
+
+        Parameters:
+        ----------
+        dataframe: pandas.DataFrame
+            Raw transaction lines with Invoice, InvoiceDate, Quantity, Price and customer id columns.
+
+        Returns:
+        -------
+        RFMStateStore
+        """
+        cols = ["Invoice", "InvoiceDate", "Quantity", "Price", self.customer_col]
+        dataframe = dataframe.loc[dataframe.notna().all(axis=1), cols]   # create_rfm gibi, eksik değerli tüm satırlar atılır
+        dataframe = dataframe.assign(TotalPrice=dataframe["Quantity"] * dataframe["Price"],
+                                     InvoiceDate=dataframe["InvoiceDate"].astype("datetime64[ns]"))
+        cancelled = dataframe["Invoice"].astype(str).str.contains("C", na=False)
+
+        delta = dataframe.loc[~cancelled].groupby(self.customer_col).agg(last_date=("InvoiceDate", "max"),
+                                                                         frequency=("Invoice", "nunique"),
+                                                                         monetary=("TotalPrice", "sum"))
+        rows = self._rows(delta.index.to_numpy())
+        self._last_date[rows] = np.maximum(self._last_date[rows], delta["last_date"].to_numpy().view("i8"))
+        self._frequency[rows] += delta["frequency"].to_numpy()
+        self._monetary[rows] += delta["monetary"].to_numpy()
+
+        if self.cancellations == "subtract" and cancelled.any():
+            delta = dataframe.loc[cancelled].groupby(self.customer_col).agg(frequency=("Invoice", "nunique"),
+                                                                            monetary=("TotalPrice", "sum"))
+            rows = self._rows(delta.index.to_numpy())
+            self._cancelled[rows] += delta["frequency"].to_numpy()
+            self._monetary[rows] += delta["monetary"].to_numpy()
+
+        return self
+
+    # Bu fonksiyon, state'i müşteri id'sine göre sıralı bir dataframe olarak döndürür.
+    # frequency iptal edilmemiş eşsiz fatura sayısıdır; cancellations="subtract" ile iptal faturaları ayrı bir sütundadır.
+    def state(self):
+        n = self.size
+        columns = {"last_date": self._last_date[:n].view("datetime64[ns]"),   # NO_DATE, NaT olarak görünür
+                   "frequency": self._frequency[:n],
+                   "monetary": self._monetary[:n]}
+        if self.cancellations == "subtract":
+            columns["cancelled_invoices"] = self._cancelled[:n]
+        state = pd.DataFrame(columns, index=pd.Index(list(self._ids[:n]), name=self.customer_col)).sort_index()
+        state.attrs = {"customer_col": self.customer_col, "cancellations": self.cancellations}
+        return state
+
+    def to_rfm(self, today_date=ANALYSIS_DATE):
+        """
+        Scores the current state against an analysis date: same output as create_rfm over the full history.
+
+        Parameters:
+        ----------
+        today_date: datetime
+            Analysis date that recency is measured against.
+
+        Returns:
+        -------
+        pandas.DataFrame
+            recency, frequency, monetary, segment columns indexed by integer customer id.
+        """
+        state = self.state()
+        state = state[state["last_date"].notna()]
+        frequency = state["frequency"]
+        if self.cancellations == "subtract":
+            frequency = (frequency - state["cancelled_invoices"]).clip(lower=0)
+        rfm = pd.DataFrame({"recency": (today_date - state["last_date"]).dt.days,
+                            "frequency": frequency,
+                            "monetary": state["monetary"]})
+        return _score_rfm(rfm)
+
+    def save(self, path):
+        self.state().to_pickle(path)
+
+    @classmethod
+    def load(cls, path):
+        state = pd.read_pickle(path)
+        store = cls(customer_col=state.attrs.get("customer_col", CUSTOMER_COL),
+                    cancellations=state.attrs.get("cancellations", "ignore"))
+        store._reserve(len(state))
+        store.size = len(state)
+        store._ids[:store.size] = state.index.to_numpy()
+        store._last_date[:store.size] = state["last_date"].to_numpy().astype("datetime64[ns]").view("i8")
+        store._frequency[:store.size] = state["frequency"].to_numpy()
+        if "cancelled_invoices" in state.columns:
+            store._cancelled[:store.size] = state["cancelled_invoices"].to_numpy()
+        store._monetary[:store.size] = state["monetary"].to_numpy()
+        store._row_of = dict(zip(state.index, range(store.size)))
+        return store
+
+
+
+##################################################################################
+# Out-of-core RFM : belleğe sığmayan işlem geçmişi üzerinde chunk chunk RFM
+##################################################################################
+
+# create_rfm tüm işlem dataframe'ini bellekte ister. Çok ülkeli, çok yıllı geçmiş belleğe sığmadığında
+# dosyalar chunk chunk okunur ve her chunk'tan sadece müşteri bazlı ara sonuçlar (partial aggregate) tutulur:
+#   - son alışveriş tarihi (max) ve toplam harcama (sum)  -> müşteri başına 2 değer
+#   - (müşteri, fatura) çiftlerinin 64-bit hash'leri      -> eşsiz fatura başına 8 + 8 byte
+# Bir fatura iki chunk'a bölünse bile aynı hash'i üretir, frequency bu yüzden create_rfm ile birebir aynıdır.
+# Bellek satır sayısıyla değil, müşteri ve fatura sayısıyla büyür. (Online Retail II: ~20 satır / fatura)
+
+class RFMPartial:
+    """
+    Mergeable per-customer partial RFM aggregates built from transaction chunks.
+
+    Parameters:
+    ----------
+    customer_col: str
+        Customer id column of the chunks.
+    frequency: str
+        "exact": (customer, invoice) hashes are kept, frequency equals create_rfm.
+        "hll": one HyperLogLog sketch per customer, memory per customer is bounded by 2^hll_precision registers.
+    hll_precision: int
+        HyperLogLog precision, only used with frequency="hll".
+
+    Example Usage:
+    --------------
+    partial = RFMPartial()
+    for chunk in iter_online_retail_chunks("online_retail_II.parquet"):
+        partial.update(chunk)
+    rfm = partial.to_rfm(today_date=dt.datetime(2011, 12, 11))
+    """
+
+    def __init__(self, customer_col=CUSTOMER_COL, frequency="exact", hll_precision=DEFAULT_HLL_PRECISION):
+        if frequency not in ("exact", "hll"):
+            raise ValueError(f"frequency must be 'exact' or 'hll', got {frequency!r}")
+        self.customer_col = customer_col
+        self.frequency = frequency
+        self.hll = GroupedHyperLogLog(hll_precision) if frequency == "hll" else None
+        self.aggregates = pd.DataFrame({"last_date": pd.Series(dtype="datetime64[ns]"),
+                                        "monetary": pd.Series(dtype="float64")})
+        self.invoice_keys = np.empty(0, dtype="uint64")       # sıralı, eşsiz (müşteri, fatura) hash'leri
+        self.key_customers = np.empty(0)                      # her hash'in müşteri id'si
+        self._pending = []                                    # henüz birleştirilmemiş (aggregates, hash, müşteri) parçaları
+        self._pending_rows = 0
+
+    # Bu fonksiyon, bir chunk'ın (veya başka bir RFMPartial'ın) ara sonuçlarını bekleyen listeye ekler.
+    # Bekleyen satırlar birleştirilmiş ara sonuç kadar büyüyünce hepsi tek seferde birleştirilir: her birleştirmenin maliyeti
+    # bekleyen satırların en fazla 2 katıdır, toplam maliyet chunk sayısının karesiyle değil, satır sayısıyla doğrusal büyür.
+    def _combine(self, aggregates, invoice_keys, key_customers):
+        self._pending.append((aggregates, invoice_keys, key_customers))
+        self._pending_rows += len(aggregates) + len(invoice_keys)
+        if self._pending_rows >= len(self.aggregates) + len(self.invoice_keys):
+            self._reduce()
+        return self
+
+    # Bu fonksiyon, bekleyen ara sonuçları birleştirir: tarih için max, harcama için sum, fatura hash'leri için birleşim.
+    def _reduce(self):
+        if not self._pending:
+            return self
+        aggregates, invoice_keys, key_customers = zip(*self._pending)
+        self.aggregates = (pd.concat([self.aggregates, *aggregates])
+                           .groupby(level=0).agg(last_date=("last_date", "max"), monetary=("monetary", "sum")))
+        keys = np.concatenate([self.invoice_keys, *invoice_keys])
+        customers = np.concatenate([self.key_customers, *key_customers])
+        self.invoice_keys, first = np.unique(keys, return_index=True)
+        self.key_customers = customers[first]
+        self._pending = []
+        self._pending_rows = 0
+        return self
+
+    def update(self, dataframe):
+        """
+        Adds one chunk of raw transaction lines. Rows are filtered exactly like create_rfm
+        (any missing value or a cancelled invoice drops the row).
+
+        Parameters:
+        ----------
+        dataframe: pandas.DataFrame
+            Raw Online Retail II lines.
+
+        Returns:
+        -------
+        RFMPartial
+        """
+        mask = dataframe.notna().all(axis=1) & ~dataframe["Invoice"].astype(str).str.contains("C", na=False)
+        chunk = dataframe.loc[mask]
+        customers = chunk[self.customer_col]
+        aggregates = pd.DataFrame({"last_date": chunk["InvoiceDate"].astype("datetime64[ns]"),
+                                   "monetary": chunk["Quantity"] * chunk["Price"],
+                                   self.customer_col: customers}).groupby(self.customer_col).agg(
+            last_date=("last_date", "max"), monetary=("monetary", "sum"))
+
+        if self.hll is not None:
+            self.hll.update(customers, chunk["Invoice"])
+            return self._combine(aggregates, np.empty(0, dtype="uint64"), np.empty(0))
+
+        keys = pd.util.hash_pandas_object(chunk[[self.customer_col, "Invoice"]].astype({"Invoice": str}),
+                                          index=False).to_numpy()
+        keys, first = np.unique(keys, return_index=True)
+        return self._combine(aggregates, keys, customers.to_numpy()[first])
+
+    # Bu fonksiyon, başka bir RFMPartial'ı (örn. başka bir dosya veya process'in sonucu) bununla birleştirir.
+    def merge(self, other):
+        if other.frequency != self.frequency:
+            raise ValueError(f"Cannot merge partials with frequency {self.frequency!r} and {other.frequency!r}")
+        if self.hll is not None:
+            self.hll.merge(other.hll)
+        other._reduce()
+        return self._combine(other.aggregates, other.invoice_keys, other.key_customers)
+
+    # Bu fonksiyon, ara sonuçlardan müşteri bazlı recency / frequency / monetary metriklerini döndürür.
+    def metrics(self, today_date=ANALYSIS_DATE):
+        self._reduce()
+        frequency = self.hll.estimate() if self.hll is not None else pd.Series(self.key_customers).value_counts()
+        rfm = pd.DataFrame({"recency": (today_date - self.aggregates["last_date"]).dt.days,
+                            "frequency": frequency.reindex(self.aggregates.index, fill_value=0),
+                            "monetary": self.aggregates["monetary"]})
+        rfm.index.name = self.customer_col
+        return rfm
+
+    def to_rfm(self, today_date=ANALYSIS_DATE):
+        return _score_rfm(self.metrics(today_date))
+
+
+def create_rfm_out_of_core(sources, today_date=ANALYSIS_DATE, customer_col=CUSTOMER_COL, chunksize=1_000_000, csv=False,
+                           frequency="exact", hll_precision=DEFAULT_HLL_PRECISION):
+    """
+    create_rfm over transaction files that do not fit in memory.
+
+    Parquet / CSV files are streamed chunk by chunk, only per-customer partial aggregates are
+    kept (see RFMPartial), so memory is bounded by the number of customers and invoices,
+    not by the number of lines. The output is the same as create_rfm on the concatenated data.
+
+    Parameters:
+    ----------
+    sources: str, list of str or iterable of pandas.DataFrame
+        .parquet / .csv paths, or any iterable of raw transaction chunks.
+    today_date: datetime
+        Analysis date.
+    customer_col: str
+        Customer id column.
+    chunksize: int
+        Rows per chunk when reading files.
+    csv: bool
+        If True, the result is also written to rfm.csv.
+    frequency: str
+        "exact" or "hll", see RFMPartial.
+    hll_precision: int
+        HyperLogLog precision, only used with frequency="hll".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        recency, frequency, monetary, segment columns indexed by integer customer id.
+
+    Example Usage:
+    --------------
+    rfm = create_rfm_out_of_core(["retail_2009_2010.parquet", "retail_2010_2011.parquet"])
+    """
+    if isinstance(sources, (str, os.PathLike)) or (isinstance(sources, list) and
+                                                  all(isinstance(source, (str, os.PathLike)) for source in sources)):
+        sources = iter_online_retail_chunks(sources, chunksize=chunksize)
+
+    partial = RFMPartial(customer_col, frequency, hll_precision)
+    for chunk in sources:
+        partial.update(chunk)
+    rfm = partial.to_rfm(today_date)
+
+    if csv:
+        rfm.to_csv("rfm.csv")
+
+    return rfm
+
+
+
+##################################################################################
+# Multi-snapshot RFM : birçok analiz tarihi için tek geçişte RFM
+##################################################################################
+
+# Churn dashboard'ları için her ay sonunda RFM segmentleri gerekiyor. create_rfm'i 24 farklı today_date ile
+# çağırmak, tüm geçmişi 24 kez baştan taramak demek.
+# rfm_snapshots işlemleri bir kez (müşteri, tarih) sırasına dizer ve müşteri bazlı kümülatif toplamları hesaplar.
+# Her analiz tarihi için müşterinin o tarihten önceki son satırı searchsorted ile bulunur:
+#   recency   = analiz tarihi - o satırın tarihi
+#   frequency = o satıra kadarki eşsiz fatura sayısı (kümülatif)
+#   monetary  = o satıra kadarki toplam harcama (kümülatif)
+# Snapshot sayısı arttıkça maliyet satır sayısıyla değil, müşteri x snapshot sayısıyla artar.
+
+def rfm_snapshots(dataframe, snapshot_dates, customer_col=CUSTOMER_COL):
+    """
+    RFM metrics and segments of every customer at many analysis dates, from one sort of the transactions.
+
+    For each snapshot date d the result equals
+    create_rfm(dataframe[dataframe["InvoiceDate"] < d], today_date=d)
+    (monetary may differ in the last floating point digits). When create_rfm cannot score a snapshot
+    (tied recency or monetary values make the quintile edges collide, typical for the first days
+    of the data), that snapshot's recency and frequency are ranked with rank(method="first") and
+    split into five equal-size groups instead, as in create_rfm_partitioned. Its segments then
+    differ from create_rfm; the other snapshots are not affected.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Raw Online Retail II transactions. The input frame is not modified.
+    snapshot_dates: list-like of datetime
+        Analysis dates. Only transactions strictly before a date are used for that snapshot.
+    customer_col: str
+        Customer id column.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        recency, frequency, monetary, segment columns indexed by (customer id, snapshot).
+        Customers without any transaction before a snapshot date are not listed for that snapshot.
+
+    Example Usage:
+    --------------
+    # Her ayın ilk günü = bir önceki ayın sonu itibarıyla RFM
+    snapshots = rfm_snapshots(df_, pd.date_range("2010-01-01", "2011-12-01", freq="MS"))
+    snapshots.xs("2011-12-01", level="snapshot")
+    """
+    dataframe = _prepare_transactions(dataframe, customer_col)
+    snapshots = pd.DatetimeIndex(snapshot_dates).unique().sort_values()
+
+    customer_codes, customers = pd.factorize(dataframe[customer_col], sort=True)
+    invoice_codes, invoices = pd.factorize(dataframe["Invoice"])
+    dates = dataframe["InvoiceDate"].to_numpy(dtype="datetime64[ns]").view("i8")
+    n_customers = len(customers)
+
+    # Müşteri + tarih (saniye) tek bir int64 anahtarda: tek argsort ile her müşterinin satırları tarih sırasına girer
+    seconds = dates // 10**9
+    origin = seconds.min() if len(seconds) else 0
+    span = (seconds.max() - origin + 2) if len(seconds) else 2
+    sort_key = customer_codes.astype("int64") * span + (seconds - origin)
+    order = np.argsort(sort_key, kind="stable")
+    sort_key = sort_key[order]
+    sorted_customers = customer_codes[order]
+    starts = np.searchsorted(sorted_customers, np.arange(n_customers))
+
+    # Kümülatif frequency: (müşteri, fatura) çiftinin tarih sırasındaki ilk satırı yeni bir faturadır
+    pair_key = sorted_customers.astype("int64") * (len(invoices) + 1) + invoice_codes[order]
+    new_invoice = np.zeros(len(order), dtype="int64")
+    new_invoice[np.unique(pair_key, return_index=True)[1]] = 1
+    cum_frequency = np.r_[0, np.cumsum(new_invoice)]
+
+    # Kümülatif monetary: müşteri bazında sıfırlanan cumsum (küresel cumsum farkındaki yuvarlama hatası olmasın)
+    cum_monetary = (pd.Series(dataframe["TotalPrice"].to_numpy(dtype="float64")[order])
+                    .groupby(sorted_customers).cumsum().to_numpy())
+
+    # Her (snapshot, müşteri) için analiz tarihinden önceki satır sayısı
+    snapshot_ns = snapshots.as_unit("ns").asi8
+    limits = np.clip(snapshots.ceil("s").as_unit("ns").asi8 // 10**9 - origin, 0, span - 1)
+    ends = np.searchsorted(sort_key, np.arange(n_customers, dtype="int64")[None, :] * span + limits[:, None])
+    snapshot_idx, customer_idx = np.nonzero(ends > starts[None, :])
+    last_rows = ends[snapshot_idx, customer_idx] - 1
+
+    metrics = pd.DataFrame({
+        "recency": (snapshot_ns[snapshot_idx] - dates[order][last_rows]) // (86_400 * 10**9),
+        "frequency": cum_frequency[last_rows + 1] - cum_frequency[starts[customer_idx]],
+        "monetary": cum_monetary[last_rows]},
+        index=pd.Index(customers[customer_idx], name=customer_col))
+
+    # Skorlar (qcut) her snapshot'ın kendi müşteri dağılımına göre. Erken snapshot'larda birkaç müşterinin recency'si
+    # eşit olabilir, quintile sınırları çakışır: bu snapshot'lar rank üzerinden skorlanır (_score_rfm_safe)
+    bounds = np.searchsorted(snapshot_idx, np.arange(len(snapshots) + 1))
+    scored = {snapshot: _score_rfm_safe(metrics.iloc[bounds[i]:bounds[i + 1]])
+              for i, snapshot in enumerate(snapshots) if bounds[i + 1] > bounds[i]}
+    if not scored:   # hiçbir analiz tarihinden önce işlem yok
+        return pd.DataFrame(columns=["recency", "frequency", "monetary", "segment"],
+                            index=pd.MultiIndex.from_arrays([[], []], names=[customer_col, "snapshot"]))
+    rfm = pd.concat(scored, names=["snapshot", customer_col])
+    return rfm.swaplevel().sort_index()
+
+
+
+##################################################################################
+# Segment Migration : ardışık snapshot'lar arasında segment geçiş matrisleri
+##################################################################################
+
+# Ardışık dönemlerde her segmentten her segmente kaç müşteri ve ne kadar harcama geçti? (örn. champions -> at_risk)
+# Segment isimleri integer kodlara çevrilir, her (dönem, eski segment, yeni segment) üçlüsü tek bir düz index olur,
+# tüm dönemlerin tüm matrisleri tek np.bincount çağrısıyla sayılır. Segment veya dönem üzerinde Python döngüsü yoktur.
+
+def segment_migrations(snapshots, include_absent=True):
+    """
+    Customer counts and monetary flows between every pair of segments, for all consecutive snapshots at once.
+
+    Parameters:
+    ----------
+    snapshots: pandas.DataFrame or dict
+        Output of rfm_snapshots (indexed by (customer id, snapshot)), or a dict {snapshot_date: create_rfm output}.
+    include_absent: bool
+        If True, customers that appear (new) or disappear between two snapshots are counted
+        from / to an extra "absent" segment. If False, only customers present in both snapshots are counted.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        customers, monetary_from, monetary_to columns indexed by
+        (snapshot_from, snapshot_to, segment_from, segment_to), zero rows included.
+        monetary_from / monetary_to: total monetary of the moving customers in the earlier / later snapshot.
+
+    Example Usage:
+    --------------
+    snapshots = rfm_snapshots(df_, pd.date_range("2010-01-01", "2011-12-01", freq="MS"))
+    migrations = segment_migrations(snapshots)
+    migrations.xs(pd.Timestamp("2011-12-01"), level="snapshot_to")["customers"].unstack()   # 11 x 11 matris
+    """
+    if not isinstance(snapshots, pd.DataFrame):
+        snapshots = pd.concat(snapshots, names=["snapshot", None]).swaplevel()
+
+    segments = snapshots["segment"]
+    labels = list(segments.cat.categories) if isinstance(segments.dtype, pd.CategoricalDtype) else list(SEGMENTS)
+    segment_codes = pd.Categorical(segments, categories=labels).codes.astype("int64")
+    if (segment_codes < 0).any():
+        raise ValueError(f"Unknown segment names: {sorted(set(segments[segment_codes < 0].astype(str)))}")
+    customer_codes = pd.factorize(snapshots.index.get_level_values(0))[0].astype("int64")
+    snapshot_codes, snapshot_values = pd.factorize(snapshots.index.get_level_values(1), sort=True)
+    n_snapshots, n_periods = len(snapshot_values), max(len(snapshot_values) - 1, 0)
+    if include_absent:
+        labels = labels + [ABSENT]
+    n_segments = len(labels)
+
+    # Müşteri, sonra snapshot sırası: aynı müşterinin ardışık snapshot'ları yan yana gelir
+    order = np.argsort(customer_codes * n_snapshots + snapshot_codes)
+    customer, period, segment = customer_codes[order], snapshot_codes[order], segment_codes[order]
+    monetary = snapshots["monetary"].to_numpy(dtype="float64")[order]
+
+    stays = (customer[1:] == customer[:-1]) & (period[1:] == period[:-1] + 1)   # i -> i + 1 geçişi
+    periods, from_codes, to_codes = [period[:-1][stays]], [segment[:-1][stays]], [segment[1:][stays]]
+    from_values, to_values = [monetary[:-1][stays]], [monetary[1:][stays]]
+
+    if include_absent:
+        absent = n_segments - 1
+        lost = ~np.r_[stays, False] & (period < n_snapshots - 1)   # bir sonraki snapshot'ta yok
+        new = ~np.r_[False, stays] & (period > 0)                  # bir önceki snapshot'ta yok
+        periods += [period[lost], period[new] - 1]
+        from_codes += [segment[lost], np.full(new.sum(), absent)]
+        to_codes += [np.full(lost.sum(), absent), segment[new]]
+        from_values += [monetary[lost], np.zeros(new.sum())]
+        to_values += [np.zeros(lost.sum()), monetary[new]]
+
+    flat = (np.concatenate(periods) * n_segments + np.concatenate(from_codes)) * n_segments + np.concatenate(to_codes)
+    size = n_periods * n_segments * n_segments
+    index = pd.MultiIndex.from_arrays([np.repeat(snapshot_values[:-1], n_segments ** 2),
+                                       np.repeat(snapshot_values[1:], n_segments ** 2),
+                                       pd.Categorical(np.tile(np.repeat(labels, n_segments), n_periods), labels),
+                                       pd.Categorical(np.tile(labels, n_periods * n_segments), labels)],
+                                      names=["snapshot_from", "snapshot_to", "segment_from", "segment_to"])
+    return pd.DataFrame({"customers": np.bincount(flat, minlength=size),
+                         "monetary_from": np.bincount(flat, weights=np.concatenate(from_values), minlength=size),
+                         "monetary_to": np.bincount(flat, weights=np.concatenate(to_values), minlength=size)},
+                        index=index)
+
+
+
+##################################################################################
+# Partitioned RFM : ülke (veya başka bir sütun) bazında paralel RFM
+##################################################################################
+
+# İş birimi RFM skorlarını global değil, her ülkenin kendi müşteri dağılımı içinde istiyor.
+# create_rfm_partitioned:
+# - Veriyi bir kez temizler, partition koduna göre sıralar: her partition tek bir ardışık dilim olur.
+# - Müşteri kodu, fatura kodu, tarih ve tutar sütunlarını shared memory'ye yazar. Worker process'ler bu buffer'ları
+#   kopyalamadan açar, sadece kendi dilimlerini okur. (pickle ile veri taşınmaz, process'lere sadece dilim sınırları gider)
+# - Her worker kendi partition'ının metriklerini (engine="numpy") ve quintile skorlarını hesaplar, küçük sonucu geri döndürür.
+# Not: Paralellik partition sayısı ve boyutlarıyla sınırlıdır. Online Retail II'de satırların ~%90'ı United Kingdom'a ait,
+# toplam süre en büyük partition'ın süresinin altına inemez. Büyük partition'lar havuza önce gönderilir.
+
+# Bu fonksiyon, bir numpy dizisini shared memory'ye kopyalar. (worker'lar isim, tip ve uzunluk ile bağlanır)
+def _to_shared(array):
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.dtype.str, len(array))
+
+
+# Worker: shared memory buffer'larına bağlanır, [start, end) dilimindeki partition'ı skorlar.
+def _rfm_partition_worker(specs, start, end, today_date):
+    handles, columns = [], {}
+    try:
+        for column, (name, dtype, length) in specs.items():
+            shm = shared_memory.SharedMemory(name=name)
+            handles.append(shm)
+            columns[column] = np.ndarray(length, dtype=dtype, buffer=shm.buf)[start:end].copy()
+    finally:
+        for shm in handles:
+            shm.close()
+    partition = pd.DataFrame({"customer": columns["customer"],
+                              "Invoice": columns["invoice"],
+                              "InvoiceDate": columns["date"].view("datetime64[ns]"),
+                              "TotalPrice": columns["total"]})
+    return _score_rfm_safe(rfm_metrics(partition, today_date, "customer", engine="numpy"))
+
+
+def create_rfm_partitioned(dataframe, today_date=ANALYSIS_DATE, customer_col=CUSTOMER_COL, partition_col="Country",
+                           max_workers=None, min_customers=5):
+    """
+    RFM scored within each partition (default: Country), computed in a process pool over shared-memory columns.
+
+    Each partition gets its own quintile scores and segments. For a partition that create_rfm can
+    score, the result equals create_rfm(dataframe[dataframe["Country"] == country]). create_rfm raises
+    a ValueError when tied recency or monetary values make the quintile edges collide (possible in
+    small partitions). Such a partition is still scored here: its recency and frequency are ranked
+    with rank(method="first") and split into five equal-size groups (ceil(rank * 5 / n), which also
+    works for fewer than five customers), so ties are broken by row order and its scores differ
+    from any create_rfm output.
+
+    Parameters:
+    ----------
+    dataframe: pandas.DataFrame
+        Raw Online Retail II transactions. The input frame is not modified.
+    today_date: datetime
+        Analysis date.
+    customer_col: str
+        Customer id column.
+    partition_col: str
+        Column to partition by, e.g. "Country".
+    max_workers: int, optional
+        Number of worker processes. Defaults to the number of CPUs. With 1, everything runs in this process.
+    min_customers: int
+        Partitions with fewer customers are scored together as one "Other" partition
+        (quintiles are not meaningful for a handful of customers). If "Other" would still have
+        fewer than min_customers customers, the small partitions join the smallest remaining partition.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        recency, frequency, monetary, segment columns indexed by (partition, customer id).
+
+    Example Usage:
+    --------------
+    rfm = create_rfm_partitioned(df_, max_workers=8)
+    rfm.loc["Germany"]
+    """
+    mask = dataframe.notna().all(axis=1) & ~dataframe["Invoice"].str.contains("C", na=False)
+    dataframe = dataframe.loc[mask]
+
+    # Müşteri sayısı az olan partition'lar "Other" altında birleşir
+    partitions = dataframe[partition_col].astype(str)
+    customers_per_partition = dataframe.groupby(partitions)[customer_col].nunique()
+    small = customers_per_partition.index[customers_per_partition < min_customers]
+    other_customers = dataframe.loc[partitions.isin(small), customer_col].nunique()
+    if 0 < other_customers < min_customers and len(small) < len(customers_per_partition):
+        # "Other" da yeterli müşteri toplayamıyorsa küçük partition'lar en küçük gerçek partition'a katılır
+        partitions = partitions.where(~partitions.isin(small), customers_per_partition.drop(small).idxmin())
+    else:
+        partitions = partitions.where(~partitions.isin(small), OTHER_PARTITION)
+
+    # Partition koduna göre tek sıralama: her partition [start, end) aralığında ardışık satırlar
+    partition_codes, partition_names = pd.factorize(partitions, sort=True)
+    order = np.argsort(partition_codes, kind="stable")
+    bounds = np.searchsorted(partition_codes[order], np.arange(len(partition_names) + 1))
+    customer_codes, customers = pd.factorize(dataframe[customer_col], sort=True)
+    columns = {"customer": customer_codes.astype("int64")[order],
+               "invoice": pd.factorize(dataframe["Invoice"])[0].astype("int64")[order],
+               "date": dataframe["InvoiceDate"].to_numpy(dtype="datetime64[ns]").view("i8")[order],
+               "total": (dataframe["Quantity"] * dataframe["Price"]).to_numpy(dtype="float64")[order]}
+
+    # Büyük partition'lar önce: en uzun iş havuzun sonunda tek başına kalmasın
+    jobs = sorted(range(len(partition_names)), key=lambda i: bounds[i] - bounds[i + 1])
+    results = {}
+    if max_workers == 1:
+        for i in jobs:
+            partition = pd.DataFrame({"customer": columns["customer"][bounds[i]:bounds[i + 1]],
+                                      "Invoice": columns["invoice"][bounds[i]:bounds[i + 1]],
+                                      "InvoiceDate": columns["date"][bounds[i]:bounds[i + 1]].view("datetime64[ns]"),
+                                      "TotalPrice": columns["total"][bounds[i]:bounds[i + 1]]})
+            results[partition_names[i]] = _score_rfm_safe(rfm_metrics(partition, today_date, "customer", engine="numpy"))
+    else:
+        shared = {column: _to_shared(values) for column, values in columns.items()}
+        specs = {column: spec for column, (_, spec) in shared.items()}
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {partition_names[i]: executor.submit(_rfm_partition_worker, specs, bounds[i], bounds[i + 1],
+                                                               today_date) for i in jobs}
+                results = {name: future.result() for name, future in futures.items()}
+        finally:
+            for shm, _ in shared.values():
+                shm.close()
+                shm.unlink()
+
+    rfm = pd.concat({name: results[name] for name in partition_names}, names=[partition_col, customer_col])
+    # Worker'lar müşteri kodlarıyla çalıştı, gerçek müşteri id'lerine geri çevirelim
+    ids = customers[rfm.index.get_level_values(1)]
+    if pd.api.types.is_numeric_dtype(ids):
+        ids = ids.astype(int)
+    rfm.index = pd.MultiIndex.from_arrays([rfm.index.get_level_values(0), ids], names=[partition_col, customer_col])
+    return rfm
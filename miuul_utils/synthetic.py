@@ -0,0 +1,220 @@
+##################################################################################
+# SYNTHETIC DATA : Online Retail II şemasında sentetik işlem verisi
+##################################################################################
+
+# create_rfm, create_cltv_c ve create_cltv_p sadece UCI'daki tek workbook (~1M satır) üzerinde çalıştırılabiliyor,
+# bu yüzden 10M / 100M satırda nasıl ölçeklendikleri bilinmiyor.
+# Bu modül, aynı 8 sütunlu şemada (Invoice, StockCode, Description, Quantity, InvoiceDate, Price, Customer ID, Country)
+# gerçekçi dağılımlara sahip sentetik veri üretir:
+# - Fatura başına satır sayısı geometrik (ortalama ~20), faturalar tarih sırasında, mesai saatlerinde
+# - Müşterilerin fatura sayıları çarpık (zipf): birkaç büyük toptancı ve çok sayıda küçük müşteri
+# - Müşterilerin ~%90'ı United Kingdom'da, faturaların ~%20'si Customer ID'siz (misafir)
+# - Ürün popülerliği zipf dağılımlı, fiyat ürüne bağlı (lognormal), adetler paket büyüklüğünün katları
+# - İptaller / iadeler: "C" ile başlayan fatura, orijinal faturanın bazı satırlarının negatif adetleri, daha sonraki bir tarihte
+# - Stok düzeltmeleri: Customer ID ve Description'ı boş, fiyatı 0, adedi negatif satırlar
+# 100M satır belleğe sığmadığından write_synthetic_online_retail veriyi chunk chunk üretip Parquet / CSV'ye yazar.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# pip install pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow yoksa sadece CSV yazılabilir
+    pa = pq = None
+
+
+START_DATE = pd.Timestamp("2009-12-01")
+N_DAYS = 739                    # 2009-12-01 - 2011-12-09
+LINES_PER_INVOICE = 20
+LINES_PER_CUSTOMER = 170        # Online Retail II: ~1M satır, ~5.9K müşteri
+CANCEL_RATE = 0.04              # iptal edilen / iade alınan fatura oranı (satırların ~%2'si)
+GUEST_RATE = 0.2                # Customer ID'siz fatura oranı
+ADJUSTMENT_RATE = 0.002         # stok düzeltme satırı oranı
+COUNTRIES = ["United Kingdom", "Germany", "France", "EIRE", "Netherlands", "Spain", "Belgium", "Switzerland",
+             "Portugal", "Australia", "Channel Islands", "Italy", "Norway", "Sweden", "Cyprus", "Finland", "Austria",
+             "Denmark", "Greece", "Japan", "Poland", "Unspecified", "USA", "Israel", "Singapore", "Iceland", "Canada",
+             "Malta", "United Arab Emirates", "Lithuania", "RSA", "Bahrain", "Hong Kong", "Thailand", "Korea",
+             "Brazil", "West Indies", "Lebanon", "Czech Republic", "Saudi Arabia", "Nigeria"]
+PACK_SIZES = np.array([1, 1, 2, 3, 4, 6, 12, 24])
+
+
+# Bu fonksiyon, chunk'lardan bağımsız sabit kataloğu üretir: müşteriler (ülke, ağırlık) ve ürünler (kod, isim, fiyat, paket).
+def _catalog(n_rows, seed):
+    rng = np.random.default_rng([seed, 0])
+    n_customers = max(n_rows // LINES_PER_CUSTOMER, 10)
+    n_products = int(np.clip(n_rows // 200, 200, 40_000))
+
+    country_weights = np.r_[0.9 * len(COUNTRIES), 1 / np.arange(1, len(COUNTRIES))]
+    customers = pd.DataFrame({
+        "customer_id": rng.permutation(n_customers) + 12346.0,
+        "country": rng.choice(len(COUNTRIES), n_customers, p=country_weights / country_weights.sum()),
+        "weight": rng.pareto(1.5, n_customers) + 1,                 # fatura sayısı çarpıklığı
+        "wholesale": rng.random(n_customers) < 0.05})              # toptancılar daha büyük adetler alır
+    customers["weight"] /= customers["weight"].sum()
+
+    popularity = 1 / np.arange(1, n_products + 1) ** 0.9
+    codes = (rng.permutation(90_000)[:n_products] + 10_000).astype(str)
+    suffixes = np.where(rng.random(n_products) < 0.3, rng.choice(list("ABCDEFGHJKLMNPS"), n_products), "")
+    products = pd.DataFrame({"stock_code": np.char.add(codes, suffixes),
+                             "description": np.char.add("PRODUCT ", codes),
+                             "price": np.round(rng.lognormal(0.9, 0.8, n_products), 2) + 0.05,
+                             "pack": rng.choice(PACK_SIZES, n_products),
+                             "popularity": rng.permutation(popularity / popularity.sum())})
+    return customers, products
+
+
+# Bu fonksiyon, [start_day, end_day) tarih aralığında tam n_lines satırlık bir chunk üretir.
+def _generate_chunk(n_lines, start_day, end_day, invoice_offset, customers, products, rng):
+    # Faturalar ve fatura başına satır sayıları (toplam n_lines'ı geçene kadar)
+    n_invoices = max(int(n_lines / LINES_PER_INVOICE * 1.2), 1)
+    lines = rng.geometric(1 / LINES_PER_INVOICE, n_invoices)
+    n_invoices = min(int(np.searchsorted(np.cumsum(lines), n_lines)) + 1, n_invoices)
+    lines = lines[:n_invoices]
+    lines[-1] -= max(lines.sum() - n_lines, 0)
+    if lines.sum() < n_lines:
+        lines[-1] += n_lines - lines.sum()
+
+    days = np.sort(rng.uniform(start_day, end_day, n_invoices))
+    invoice_dates = np.sort((START_DATE + pd.to_timedelta(np.floor(days), unit="D")
+                             + pd.to_timedelta(rng.integers(7 * 60, 20 * 60, n_invoices), unit="min")).to_numpy())
+    customer_rows = rng.choice(len(customers), n_invoices, p=customers["weight"].to_numpy())
+    guest = rng.random(n_invoices) < GUEST_RATE
+    invoice_customer = np.where(guest, np.nan, customers["customer_id"].to_numpy()[customer_rows])
+    invoice_country = customers["country"].to_numpy()[customer_rows]
+    wholesale = customers["wholesale"].to_numpy()[customer_rows] & ~guest
+
+    # Satırlar
+    invoice_of_line = np.repeat(np.arange(n_invoices), lines)
+    product = rng.choice(len(products), n_lines, p=products["popularity"].to_numpy())
+    quantity = (rng.geometric(0.35, n_lines) * products["pack"].to_numpy()[product]
+                * np.where(wholesale[invoice_of_line], rng.integers(2, 10, n_lines), 1))
+    price = products["price"].to_numpy()[product] * np.where(quantity >= 24, 0.85, 1.0)   # toplu alımda indirim
+    frame = pd.DataFrame({"Invoice": invoice_offset + invoice_of_line,
+                          "product": product,
+                          "Quantity": quantity.astype("int64"),
+                          "InvoiceDate": invoice_dates[invoice_of_line],
+                          "Price": np.round(price, 2),
+                          "Customer ID": invoice_customer[invoice_of_line],
+                          "country": invoice_country[invoice_of_line],
+                          "cancel": False})
+
+    # İptaller / iadeler: müşterili faturaların bir kısmında, satırların ~yarısı negatif adetle, 0-30 gün sonra
+    cancelled = rng.random(n_invoices) < CANCEL_RATE / (1 - GUEST_RATE)
+    cancelled &= ~guest
+    returned = frame.loc[cancelled[invoice_of_line] & (rng.random(n_lines) < 0.5)].copy()
+    if len(returned):
+        delay = pd.to_timedelta(rng.integers(0, 30 * 24 * 60, n_invoices), unit="min").to_numpy()
+        end_date = (START_DATE + pd.to_timedelta(end_day, unit="D")).to_datetime64()
+        returned["InvoiceDate"] = np.minimum(returned["InvoiceDate"].to_numpy() + delay[returned["Invoice"] - invoice_offset],
+                                             end_date - np.timedelta64(1, "m"))
+        returned["Quantity"] = -np.maximum(returned["Quantity"].to_numpy() // rng.integers(1, 3, len(returned)), 1)
+        returned["Invoice"] = returned["Invoice"] + n_invoices     # iptal faturası ayrı bir numara alır
+        returned["cancel"] = True
+
+    # Stok düzeltmeleri: Customer ID'siz, Description'sız, fiyatı 0, adedi negatif
+    adjustments = frame.sample(frac=ADJUSTMENT_RATE, random_state=rng.integers(2 ** 31)).copy()
+    adjustments["Quantity"] = -adjustments["Quantity"]
+    adjustments["Price"] = 0.0
+    adjustments["Customer ID"] = np.nan
+    adjustments["Invoice"] = adjustments["Invoice"] + 2 * n_invoices
+
+    frame = pd.concat([frame, returned, adjustments], ignore_index=True)
+    # Tam n_lines satır: fazla satırlar rastgele atılır (sondan kesilirse son günler eksik kalır)
+    keep = np.sort(rng.choice(len(frame), n_lines, replace=False))
+    frame = frame.iloc[np.argsort(frame["InvoiceDate"].to_numpy(), kind="stable")[keep]]
+
+    invoice = frame["Invoice"].to_numpy().astype(str)
+    description = products["description"].to_numpy()[frame["product"].to_numpy()].astype(object)
+    description[frame.index >= n_lines + len(returned)] = np.nan          # stok düzeltme satırları
+    return pd.DataFrame({"Invoice": np.where(frame["cancel"].to_numpy(), np.char.add("C", invoice), invoice),
+                         "StockCode": products["stock_code"].to_numpy()[frame["product"].to_numpy()],
+                         "Description": description,
+                         "Quantity": frame["Quantity"].to_numpy(),
+                         "InvoiceDate": frame["InvoiceDate"].to_numpy(),
+                         "Price": frame["Price"].to_numpy(),
+                         "Customer ID": frame["Customer ID"].to_numpy(),
+                         "Country": pd.Categorical.from_codes(frame["country"].to_numpy(), COUNTRIES)})
+
+
+def iter_synthetic_online_retail(n_rows, chunksize=5_000_000, seed=42):
+    """
+    Yields synthetic Online Retail II transactions chunk by chunk, in date order.
+
+    Chunks cover consecutive date windows and share one customer / product catalog,
+    so concatenating them gives the same data as one big frame.
+
+    Parameters:
+    ----------
+    n_rows: int
+        Total number of lines.
+    chunksize: int
+        Lines per chunk.
+    seed: int
+        Random seed, the same seed and sizes always give the same data.
+
+    Returns:
+    -------
+    generator of pandas.DataFrame
+        Invoice, StockCode, Description, Quantity, InvoiceDate, Price, Customer ID, Country columns.
+    """
+    customers, products = _catalog(n_rows, seed)
+    n_chunks = max(int(np.ceil(n_rows / chunksize)), 1)
+    invoice_offset = 489434
+    for i in range(n_chunks):
+        n_lines = min(chunksize, n_rows - i * chunksize)
+        rng = np.random.default_rng([seed, i + 1])
+        chunk = _generate_chunk(n_lines, N_DAYS * i / n_chunks, N_DAYS * (i + 1) / n_chunks,
+                                invoice_offset, customers, products, rng)
+        invoice_offset += 3 * n_lines           # normal + iptal + düzeltme numaraları için yeterli aralık
+        yield chunk
+
+
+def synthetic_online_retail(n_rows, seed=42, chunksize=5_000_000):
+    """
+    Synthetic Online Retail II transactions in memory (see iter_synthetic_online_retail).
+
+    Example Usage:
+    --------------
+    df_ = synthetic_online_retail(1_000_000)
+    create_rfm(df_)
+    """
+    chunks = list(iter_synthetic_online_retail(n_rows, chunksize, seed))
+    dataframe = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    dataframe["Country"] = dataframe["Country"].astype(pd.CategoricalDtype(COUNTRIES))
+    return dataframe
+
+
+def write_synthetic_online_retail(path, n_rows, chunksize=5_000_000, seed=42):
+    """
+    Writes synthetic Online Retail II transactions to a .parquet or .csv file chunk by chunk,
+    with memory bounded by chunksize (100M lines can be generated on a laptop).
+
+    Example Usage:
+    --------------
+    write_synthetic_online_retail("retail_100m.parquet", 100_000_000)
+    rfm = create_rfm_out_of_core("retail_100m.parquet")
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension not in (".parquet", ".csv"):
+        raise ValueError(f"path must end with .parquet or .csv, got {path!r}")
+    if extension == ".parquet" and pq is None:
+        raise ImportError("Writing parquet files requires pyarrow: pip install pyarrow")
+
+    writer = None
+    try:
+        for i, chunk in enumerate(iter_synthetic_online_retail(n_rows, chunksize, seed)):
+            if extension == ".csv":
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+                continue
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
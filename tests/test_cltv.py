@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from miuul_utils import bgnbd, cltv
+from miuul_utils.cltv import bootstrap_cltv, cltv_p_metrics
+from miuul_utils.synthetic import synthetic_online_retail
+
+
+@pytest.fixture(scope="module")
+def cltv_df():
+    return cltv_p_metrics(synthetic_online_retail(100_000))
+
+
+# Bu fonksiyon, BGNBDFitter.fit'i bootstrap tekrarlarının (ağırlıklı) fit'lerinde, fails(initial_params) True ise yakınsamaz yapar.
+def _fail_fit(monkeypatch, fails):
+    fit = bgnbd.BGNBDFitter.fit
+    calls = []
+
+    def failing_fit(self, frequency, recency, T, weights=None, initial_params=None, **kwargs):
+        calls.append(initial_params is None)
+        if weights is not None and fails(initial_params):
+            raise bgnbd.ConvergenceError("BG-NBD fit did not converge: forced")
+        return fit(self, frequency, recency, T, weights=weights, initial_params=initial_params, **kwargs)
+
+    monkeypatch.setattr(bgnbd.BGNBDFitter, "fit", failing_fit)
+    return calls
+
+
+def test_bootstrap_retries_cold_start(cltv_df, monkeypatch):
+    # Warm start hep yakınsamaz, cold start yakınsar: hiçbir tekrar atlanmaz
+    calls = _fail_fit(monkeypatch, lambda initial_params: initial_params is not None)
+    intervals = bootstrap_cltv(cltv_df, n_bootstrap=4, quantiles=(0.05, 0.95), max_workers=1)
+    assert intervals.attrs["n_bootstrap"] == 4
+    assert intervals.attrs["n_dropped"] == 0
+    assert calls.count(True) >= 4
+    assert np.isfinite(intervals.to_numpy()).all()
+
+
+def test_bootstrap_drops_non_converging_replicate(cltv_df, monkeypatch):
+    # İlk tekrar ne warm ne cold start ile yakınsar: atlanır, diğerleri kullanılır
+    failed = []
+
+    def fails(initial_params):
+        if len(failed) < 2:
+            failed.append(initial_params is None)
+            return True
+        return False
+
+    _fail_fit(monkeypatch, fails)
+    intervals = bootstrap_cltv(cltv_df, n_bootstrap=4, quantiles=(0.05, 0.95), max_workers=1)
+    assert failed == [False, True]
+    assert intervals.attrs["n_bootstrap"] == 3
+    assert intervals.attrs["n_dropped"] == 1
+
+
+def test_bootstrap_raises_if_every_replicate_fails(cltv_df, monkeypatch):
+    _fail_fit(monkeypatch, lambda initial_params: True)
+    with pytest.raises(cltv.ConvergenceError):
+        bootstrap_cltv(cltv_df, n_bootstrap=2, max_workers=1)
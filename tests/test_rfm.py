@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from miuul_utils.rfm import create_rfm, rfm_snapshots
+from miuul_utils.synthetic import synthetic_online_retail
+
+
+@pytest.fixture(scope="module")
+def transactions():
+    return synthetic_online_retail(20_000)
+
+
+def test_rfm_snapshots_scores_early_snapshot_with_tied_values(transactions):
+    # 2009-12-02'de birkaç müşterinin recency'si aynı: create_rfm'in quintile sınırları çakışır
+    early = pd.Timestamp("2009-12-02")
+    with pytest.raises(ValueError):
+        create_rfm(transactions[transactions["InvoiceDate"] < early], today_date=early)
+
+    snapshot_dates = pd.to_datetime(["2009-12-02", "2009-12-03", "2009-12-05", "2011-12-01"])
+    snapshots = rfm_snapshots(transactions, snapshot_dates)
+
+    assert set(snapshots.index.get_level_values("snapshot")) == set(snapshot_dates)
+    assert snapshots["segment"].notna().all()
+
+    last = pd.Timestamp("2011-12-01")
+    expected = create_rfm(transactions[transactions["InvoiceDate"] < last], today_date=last)
+    pd.testing.assert_frame_equal(snapshots.xs(last, level="snapshot"), expected,
+                                  check_dtype=False, check_names=False)